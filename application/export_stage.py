@@ -0,0 +1,96 @@
+# export_stage.py
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from application.interface import UmlExporter
+from application.profiler import get_profiler
+from core.uml_class import UmlClass
+from core.uml_relationshpi import UmlRelationship
+
+
+def output_size(output_path: str) -> int:
+    """
+    Bytes written for an output path: a file, a directory of partitions, or
+    a file with a format suffix added by the renderer (e.g. "x.gv.svg").
+    """
+    if os.path.isdir(output_path):
+        return sum(entry.stat().st_size for entry in os.scandir(output_path) if entry.is_file())
+    total = 0
+    for path in (output_path, output_path + ".svg"):
+        if os.path.isfile(path):
+            total += os.path.getsize(path)
+    return total
+
+
+class ExportResult:
+    def __init__(self, exporter: UmlExporter, output_path: str, seconds: float, error: Exception = None):
+        self.exporter = exporter
+        self.output_path = output_path
+        self.seconds = seconds
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        status = "ok" if self.ok else f"failed: {self.error!r}"
+        return f"ExportResult({type(self.exporter).__name__} -> {self.output_path}, {self.seconds:.2f}s, {status})"
+
+
+class ExportStage:
+    """
+    Runs all registered exporters concurrently. Each exporter writes
+    `<output_dir>/<output_name><exporter.file_extension>`; a failing exporter
+    does not stop the others.
+    """
+
+    def __init__(self, exporters: List[UmlExporter], output_dir: str = "output", output_name: str = "test",
+                 workers: int = None):
+        self.exporters = list(exporters)
+        self.output_dir = output_dir
+        self.output_name = output_name
+        self.workers = workers
+
+    def output_path(self, exporter: UmlExporter) -> str:
+        return os.path.join(self.output_dir, self.output_name + exporter.file_extension)
+
+    def run(self, classes: List[UmlClass], relationships: List[UmlRelationship],
+            exporters: List[UmlExporter] = None) -> List[ExportResult]:
+        """
+        Runs the given registered exporters, or all of them.
+        """
+        if exporters is None:
+            exporters = self.exporters
+        unknown = [exporter for exporter in exporters if exporter not in self.exporters]
+        if unknown:
+            raise ValueError(f"Exporters not registered with the export stage: {unknown}")
+        os.makedirs(self.output_dir, exist_ok=True)
+        if not exporters:
+            return []
+
+        workers = self.workers or len(exporters)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._run_one, exporter, classes, relationships)
+                for exporter in exporters
+            ]
+            return [future.result() for future in futures]
+
+    def _run_one(self, exporter: UmlExporter, classes: List[UmlClass], relationships: List[UmlRelationship]) -> ExportResult:
+        output_path = self.output_path(exporter)
+        profiler = get_profiler()
+        start = time.perf_counter()
+        try:
+            with profiler.stage(f"export {type(exporter).__name__}", output=output_path):
+                exporter.export(classes, relationships, output_path)
+        except Exception as e:
+            print(f"Export to {output_path} failed:")
+            traceback.print_exc()
+            return ExportResult(exporter, output_path, time.perf_counter() - start, e)
+        if profiler.enabled:
+            profiler.add_bytes_written(output_size(output_path))
+        return ExportResult(exporter, output_path, time.perf_counter() - start)
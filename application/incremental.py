@@ -0,0 +1,107 @@
+# incremental.py
+import os
+import json
+import hashlib
+from typing import List, Optional
+
+from core.uml_class import UmlClass
+from core.uml_relationshpi import UmlRelationship
+
+
+def class_fingerprint(uml_class: UmlClass) -> str:
+    """
+    Hash of everything that influences the rendered class image.
+    """
+    payload = json.dumps([uml_class.name, uml_class.methods, uml_class.is_abstract], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def relationship_key(relationship: UmlRelationship) -> list:
+    return [relationship.source, relationship.destination, relationship.type, relationship.access, relationship.label]
+
+
+class BuildManifest:
+    """
+    Snapshot of the classes, relationships and positions of the previous run.
+    """
+
+    def __init__(self, classes: dict = None, relationships: list = None):
+        # str(class_id) -> {"fingerprint", "groups", "position", "size"}
+        self.classes = classes or {}
+        self.relationships = relationships or []
+
+    @classmethod
+    def from_model(cls, uml_classes: List[UmlClass], relationships: List[UmlRelationship]):
+        classes = {}
+        for uml_class in uml_classes:
+            classes[str(uml_class.class_id)] = {
+                "fingerprint": class_fingerprint(uml_class),
+                "groups": list(uml_class.groups),
+                "position": list(uml_class.position),
+                "size": list(uml_class.size),
+            }
+        return cls(classes, [relationship_key(rel) for rel in relationships])
+
+    @classmethod
+    def load(cls, file_path: str) -> Optional["BuildManifest"]:
+        if not os.path.exists(file_path):
+            return None
+        try:
+            with open(file_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable manifest {file_path}: {e}")
+            return None
+        return cls(data.get("classes", {}), data.get("relationships", []))
+
+    def save(self, file_path: str):
+        with open(file_path, 'w') as f:
+            json.dump({"classes": self.classes, "relationships": self.relationships}, f)
+
+
+class ModelDiff:
+    def __init__(self):
+        self.added = set()
+        self.removed = set()
+        self.changed = set()
+        self.moved = set()
+        self.regrouped = set()
+        self.relationships_changed = False
+
+    @property
+    def needs_render(self) -> set:
+        """Classes whose image has to be rendered again."""
+        return self.added | self.changed
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed or self.moved
+                    or self.regrouped or self.relationships_changed)
+
+    def __repr__(self):
+        return (f"ModelDiff(added={len(self.added)}, removed={len(self.removed)}, "
+                f"changed={len(self.changed)}, moved={len(self.moved)}, "
+                f"regrouped={len(self.regrouped)}, relationships_changed={self.relationships_changed})")
+
+
+def diff_model(manifest: BuildManifest, uml_classes: List[UmlClass], relationships: List[UmlRelationship]) -> ModelDiff:
+    diff = ModelDiff()
+    current_ids = set()
+
+    for uml_class in uml_classes:
+        class_id = str(uml_class.class_id)
+        current_ids.add(class_id)
+        previous = manifest.classes.get(class_id)
+
+        if previous is None:
+            diff.added.add(class_id)
+            continue
+        if previous["fingerprint"] != class_fingerprint(uml_class):
+            diff.changed.add(class_id)
+        if tuple(previous["position"]) != tuple(uml_class.position):
+            diff.moved.add(class_id)
+        if list(previous["groups"]) != list(uml_class.groups):
+            diff.regrouped.add(class_id)
+
+    diff.removed = set(manifest.classes) - current_ids
+    diff.relationships_changed = manifest.relationships != [relationship_key(rel) for rel in relationships]
+    return diff
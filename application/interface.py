@@ -13,6 +13,11 @@ class UmlImporter(ABC):
         pass
 
 class UmlExporter(ABC):
+    # Rendered artifacts (see core.uml_class) this exporter reads from each class
+    required_artifacts = frozenset()
+    # Appended to the output name by the export stage
+    file_extension = ""
+
     @abstractmethod
     def export(self, classes: list[UmlClass], relationships: list[UmlRelationship], output_path:str):
         pass
@@ -33,4 +38,13 @@ class ClassImageGenerator(ABC):
 
     @abstractmethod
     def generate_svg(self, uml_class: UmlClass):
-        pass
\ No newline at end of file
+        pass
+
+class AsyncClassImageGenerator(ABC):
+    @abstractmethod
+    async def generate_png(self, uml_class: UmlClass):
+        pass
+
+    @abstractmethod
+    async def generate_svg(self, uml_class: UmlClass):
+        pass
@@ -0,0 +1,189 @@
+# profiler.py
+import os
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import List
+
+CATEGORY_STAGE = "stage"
+CATEGORY_RENDER = "render"
+CATEGORY_SUBPROCESS = "subprocess"
+
+
+class ProfileSpan:
+    __slots__ = ("name", "category", "start", "seconds", "thread_id", "args")
+
+    def __init__(self, name: str, category: str, start: float, seconds: float, thread_id: int, args: dict):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.seconds = seconds
+        self.thread_id = thread_id
+        self.args = args
+
+
+class Profiler:
+    """
+    Collects timed spans of the pipeline stages, subprocess invocations,
+    bytes written and peak memory. Disabled by default; while disabled the
+    instrumentation points cost one attribute check.
+
+    Spans can be recorded from several threads. Work done in worker
+    processes is not recorded.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.track_memory = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def enable(self, track_memory: bool = False):
+        self.enabled = True
+        self.track_memory = track_memory
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.track_memory = False
+
+    def reset(self):
+        with self._lock:
+            self.spans: List[ProfileSpan] = []
+            self.subprocess_count = 0
+            self.subprocess_seconds = 0.0
+            self.bytes_written = 0
+            self.peak_memory = 0
+            self._origin = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, category: str = CATEGORY_STAGE, **args):
+        """
+        Times the enclosed block. Outermost stages of the main thread also
+        record the peak traced memory while they ran.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        depth = getattr(self._local, "depth", 0)
+        # The traced peak is process-wide, so only the main thread may reset it
+        measure_memory = (self.track_memory and depth == 0 and tracemalloc.is_tracing()
+                          and threading.current_thread() is threading.main_thread())
+        if measure_memory:
+            tracemalloc.reset_peak()
+
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._local.depth = depth
+            if measure_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                args["peak_memory"] = peak
+                with self._lock:
+                    self.peak_memory = max(self.peak_memory, peak)
+            self._record(ProfileSpan(name, category, start, seconds, threading.get_ident(), args))
+
+    @contextmanager
+    def subprocess(self, name: str, **args):
+        """
+        Times one external process invocation.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self.subprocess_count += 1
+                self.subprocess_seconds += seconds
+            self._record(ProfileSpan(name, CATEGORY_SUBPROCESS, start, seconds, threading.get_ident(), args))
+
+    def add_bytes_written(self, count: int):
+        if self.enabled:
+            with self._lock:
+                self.bytes_written += count
+
+    def report(self, slowest: int = 10) -> dict:
+        with self._lock:
+            spans = list(self.spans)
+            report = {
+                "wall_seconds": time.perf_counter() - self._origin,
+                "subprocesses": {"count": self.subprocess_count, "seconds": self.subprocess_seconds},
+                "bytes_written": self.bytes_written,
+                "peak_memory_bytes": self.peak_memory if self.track_memory else None,
+            }
+
+        stages = {}
+        for span in spans:
+            if span.category == CATEGORY_SUBPROCESS:
+                continue
+            entry = stages.setdefault(span.name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            entry["count"] += 1
+            entry["total_seconds"] += span.seconds
+            entry["max_seconds"] = max(entry["max_seconds"], span.seconds)
+            if "peak_memory" in span.args:
+                entry["peak_memory_bytes"] = max(entry.get("peak_memory_bytes", 0), span.args["peak_memory"])
+        report["stages"] = stages
+
+        renders = sorted((span for span in spans if span.category == CATEGORY_RENDER),
+                         key=lambda span: span.seconds, reverse=True)
+        report["slowest_renders"] = [dict(span.args, seconds=span.seconds) for span in renders[:slowest]]
+        return report
+
+    def write_json(self, file_path: str):
+        with open(file_path, 'w') as f:
+            json.dump(self.report(), f, indent=2, default=str)
+
+    def write_chrome_trace(self, file_path: str):
+        """
+        Writes the spans in the Chrome trace event format (chrome://tracing, Perfetto).
+        """
+        with self._lock:
+            spans = list(self.spans)
+
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": (span.start - self._origin) * 1e6,
+                "dur": span.seconds * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": span.args,
+            }
+            for span in spans
+        ]
+        with open(file_path, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+
+    # -------------------------------------------------------------
+
+    def _record(self, span: ProfileSpan):
+        with self._lock:
+            self.spans.append(span)
+
+
+_profiler = Profiler()
+
+
+def get_profiler() -> Profiler:
+    """
+    The process-wide profiler used by the instrumentation points.
+    """
+    return _profiler
@@ -0,0 +1,164 @@
+# render_pool.py
+import os
+import math
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List
+
+from core.uml_class import UmlClass, ALL_ARTIFACTS, ARTIFACT_SVG, ARTIFACT_PNG, ARTIFACT_CODE
+from application.profiler import get_profiler, CATEGORY_RENDER
+
+
+def render_class(generator, uml_class: UmlClass, artifacts=ALL_ARTIFACTS):
+    """
+    Renders the requested artifacts of a single class; skipped ones are None.
+    Module level so it can be shipped to worker processes.
+    """
+    with get_profiler().stage("render_class", CATEGORY_RENDER, class_id=uml_class.class_id, class_name=uml_class.name):
+        png_data = generator.generate_png(uml_class) if ARTIFACT_PNG in artifacts else None
+        svg_data = generator.generate_svg(uml_class) if ARTIFACT_SVG in artifacts else None
+        code_data = generator.generate_graphviz_label(uml_class) if ARTIFACT_CODE in artifacts else None
+    return png_data, svg_data, code_data
+
+
+def render_class_batch(generator, uml_classes: List[UmlClass], artifacts=ALL_ARTIFACTS):
+    """
+    Renders a list of classes with one Graphviz invocation per format.
+    """
+    skipped = [None] * len(uml_classes)
+    png_batch = generator.generate_png_batch(uml_classes) if ARTIFACT_PNG in artifacts else skipped
+    svg_batch = generator.generate_svg_batch(uml_classes) if ARTIFACT_SVG in artifacts else skipped
+    if ARTIFACT_CODE in artifacts:
+        code_batch = [generator.generate_graphviz_label(uml_class) for uml_class in uml_classes]
+    else:
+        code_batch = skipped
+    return list(zip(png_batch, svg_batch, code_batch))
+
+
+def render_chunk(generator, uml_classes: List[UmlClass], artifacts=ALL_ARTIFACTS) -> list:
+    """
+    render_class for each class of a chunk sent to a worker process.
+    """
+    return [render_class(generator, uml_class, artifacts) for uml_class in uml_classes]
+
+
+def render_in_worker(function, generator, uml_classes: List[UmlClass], artifacts=ALL_ARTIFACTS):
+    """
+    Runs a chunk render function in a worker process. Returns its results
+    with the activity of the generator's render cache, which the parent
+    merges into its own cache.
+    """
+    results = function(generator, uml_classes, artifacts)
+    cache = getattr(generator, "cache", None)
+    return results, cache.take_activity() if cache is not None else None
+
+
+async def render_class_async(generator, uml_class: UmlClass, artifacts=ALL_ARTIFACTS):
+    """
+    render_class for an AsyncClassImageGenerator.
+    """
+    with get_profiler().stage("render_class", CATEGORY_RENDER, class_id=uml_class.class_id, class_name=uml_class.name):
+        png_data = await generator.generate_png(uml_class) if ARTIFACT_PNG in artifacts else None
+        svg_data = await generator.generate_svg(uml_class) if ARTIFACT_SVG in artifacts else None
+        code_data = generator.generate_graphviz_label(uml_class) if ARTIFACT_CODE in artifacts else None
+    return png_data, svg_data, code_data
+
+
+async def render_classes_async(generator, uml_classes: List[UmlClass], artifacts=ALL_ARTIFACTS) -> list:
+    """
+    Renders all classes concurrently; the generator's renderer bounds the
+    number of running subprocesses. Results are in input order.
+    """
+    return list(await asyncio.gather(*(render_class_async(generator, uml_class, artifacts) for uml_class in uml_classes)))
+
+
+class ClassRenderPool:
+    """
+    Fans class rendering out over a thread or process pool.
+
+    Results are returned in the order of the input classes, independent of
+    the order in which the workers finish. One pool can be shared by
+    several diagrams rendering concurrently.
+
+    In a process pool the workers report their render cache hits, misses
+    and writes back; the generator's cache in this process counts them and
+    does the eviction.
+    """
+
+    def __init__(self, workers: int = None, kind: str = "thread"):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown pool kind: {kind}")
+
+        self.workers = workers or os.cpu_count() or 1
+        self.kind = kind
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def render(self, generator, classes: List[UmlClass], artifacts=ALL_ARTIFACTS) -> list:
+        if not classes:
+            return []
+
+        executor = self._get_executor()
+        if self.kind == "process":
+            # Ship classes in chunks so the generator is pickled once per chunk
+            chunk_size = max(1, len(classes) // (self.workers * 4))
+            chunks = [classes[i:i + chunk_size] for i in range(0, len(classes), chunk_size)]
+            return self._render_in_processes(executor, render_chunk, generator, chunks, artifacts)
+
+        return list(executor.map(lambda uml_class: render_class(generator, uml_class, artifacts), classes))
+
+    def render_batches(self, generator, classes: List[UmlClass], artifacts=ALL_ARTIFACTS) -> list:
+        """
+        Splits the classes into one contiguous batch per worker and renders
+        each batch with a single Graphviz invocation per format.
+        """
+        if not classes:
+            return []
+
+        batch_size = math.ceil(len(classes) / self.workers)
+        batches = [classes[i:i + batch_size] for i in range(0, len(classes), batch_size)]
+
+        executor = self._get_executor()
+        if self.kind == "process":
+            return self._render_in_processes(executor, render_class_batch, generator, batches, artifacts)
+
+        results = []
+        for batch_result in executor.map(render_class_batch, [generator] * len(batches), batches,
+                                         [artifacts] * len(batches)):
+            results.extend(batch_result)
+        return results
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # -------------------------------------------------------------
+
+    @staticmethod
+    def _render_in_processes(executor, function, generator, chunks: list, artifacts) -> list:
+        cache = getattr(generator, "cache", None)
+        results = []
+        for chunk_results, activity in executor.map(render_in_worker, [function] * len(chunks),
+                                                    [generator] * len(chunks), chunks,
+                                                    [artifacts] * len(chunks)):
+            results.extend(chunk_results)
+            if cache is not None and activity is not None:
+                cache.merge_activity(activity)
+        return results
@@ -1,57 +1,423 @@
 # uml_app.py
 
 from typing import List, Tuple
+import os
 import re
+import json
 
-from core.uml_class import UmlClass
+from core.uml_class import UmlClass, ARTIFACT_SVG, ARTIFACT_PNG, ARTIFACT_CODE, ARTIFACT_SIZE
 from core.uml_relationshpi import UmlRelationship
+from core.spatial_index import SpatialIndex
 
 from importer.json_importer import JsonUmlImporter
-from class_generators.plantuml_class_generator import PlantUmlClassDiagramGenerator
-from class_generators.graphviz_class_generator import GraphvizClassDiagramGenerator
+from importer.streaming_json_importer import StreamingJsonUmlImporter
+from importer.snapshot_importer import SnapshotImporter, write_snapshot, read_snapshot_source, source_fingerprint
+from class_generators.plantuml_class_generator import (PlantUmlClassDiagramGenerator, PlantUmlRenderBackend,
+                                                      AsyncPlantUmlClassDiagramGenerator)
+from class_generators.plantuml_server import PlantUmlPipeServer
+from class_generators.graphviz_class_generator import GraphvizClassDiagramGenerator, AsyncGraphvizClassDiagramGenerator
+from class_generators.render_cache import RenderCache
+from class_generators.svg_optimizer import SvgOptimizer, optimize_classes
+from application.render_pool import ClassRenderPool, render_class, render_class_batch, render_classes_async
+from application.incremental import BuildManifest, diff_model
+from application.export_stage import ExportStage
+from application.profiler import get_profiler
 from export.drawio_exporter import DrawioUmlExporter
 from export.graphviz_exporter import GraphvizUmlExporter
+from export.partitioned_exporter import PartitionedUmlExporter
 from placing_tool.placing_tool import DrawioPositionTool
+from placing_tool.auto_layout import AutoLayout
 
 class UmlClassDiagram:
-    def __init__(self):
+    def __init__(self, cache_dir: str = ".uml_render_cache", cache_max_bytes: int = 256 * 1024 * 1024,
+                 render_workers: int = 1, render_pool_kind: str = "thread", render_batch: bool = False,
+                 render_backend: str = "graphviz", plantuml_server: bool = False, streaming_import: bool = False,
+                 output_dir: str = "output", output_name: str = "test", export_workers: int = None,
+                 native_graphviz_layout: bool = False, partition_mode: str = None,
+                 dedupe_relationships: bool = True, prune_transitive: tuple = (), profile: bool = False,
+                 profile_memory: bool = False,
+                 render_cache: RenderCache = None, render_pool: ClassRenderPool = None,
+                 graphviz_generator: GraphvizClassDiagramGenerator = None):
         self.uml_classes: List[UmlClass] = []
         self.relationships: List[UmlRelationship] = [] 
-        self.json_importer = JsonUmlImporter()  # Create an instance of JsonUmlImporter
-        self.class_generator = PlantUmlClassDiagramGenerator()
-        self.class_generator_graphviz = GraphvizClassDiagramGenerator()
+        # Stage timings, subprocesses and bytes written; see write_profile.
+        # profile_memory adds the peak memory per stage through tracemalloc, which slows every allocation
+        self.profiler = get_profiler()
+        if profile:
+            self.profiler.enable(track_memory=profile_memory)
+        # The streaming importer parses the input incrementally for very large models
+        self.json_importer = StreamingJsonUmlImporter() if streaming_import else JsonUmlImporter()
+        # A given render_cache/render_pool/graphviz_generator is shared with other diagrams, e.g. by the batch CLI
+        self.render_cache = render_cache or (RenderCache(cache_dir, cache_max_bytes) if cache_dir else None)
+        if render_backend not in ("graphviz", "plantuml"):
+            raise ValueError(f"Unknown render backend: {render_backend}")
+        if plantuml_server and render_backend != "plantuml":
+            raise ValueError("plantuml_server needs render_backend='plantuml'")
+        if plantuml_server and render_pool_kind == "process":
+            raise ValueError("plantuml_server cannot be shared with a process render pool")
+        self.class_generator = PlantUmlClassDiagramGenerator(server=PlantUmlPipeServer() if plantuml_server else None)
+        self.class_generator_graphviz = graphviz_generator or GraphvizClassDiagramGenerator(cache=self.render_cache)
+        # Renders the class images; the Graphviz labels always come from class_generator_graphviz
+        if render_backend == "plantuml":
+            self.render_generator = PlantUmlRenderBackend(self.class_generator, self.class_generator_graphviz)
+        else:
+            self.render_generator = self.class_generator_graphviz
+        # Used by gernate_classes_async; renders through asyncio subprocesses
+        if render_backend == "plantuml":
+            self.async_class_generator = AsyncPlantUmlClassDiagramGenerator(self.render_generator)
+        else:
+            self.async_class_generator = AsyncGraphvizClassDiagramGenerator(self.class_generator_graphviz)
+        # render_workers=None uses one worker per CPU, 1 renders in the calling thread
+        self.render_pool = render_pool or (ClassRenderPool(render_workers, render_pool_kind) if render_workers != 1 else None)
+        self._owns_render_pool = render_pool is None
+        # Batch mode renders all classes in one Graphviz invocation per format
+        self.render_batch = render_batch
         self.exporter = DrawioUmlExporter()
-        self.exporter_graphviz = GraphvizUmlExporter()
+        # Native layout skips the neato solver and renders the placed positions as-is
+        self.exporter_graphviz = GraphvizUmlExporter(native_layout=native_graphviz_layout)
+        # Exporters run concurrently by export_diagram
+        exporters = [self.exporter, self.exporter_graphviz]
+        # "group" or "tile" additionally writes the draw.io diagram split into parts
+        if partition_mode:
+            exporters.append(PartitionedUmlExporter(DrawioUmlExporter(), partition_mode))
+        self.export_stage = ExportStage(exporters, output_dir, output_name, export_workers)
+        # Exported edges: parallel duplicates dropped, transitive edges of these types pruned
+        self.dedupe_relationships = dedupe_relationships
+        self.prune_transitive = tuple(prune_transitive)
         self.tool = DrawioPositionTool()
+        self.layout_engine = AutoLayout()
+        # Placed class boxes, for overlap checks and viewport queries
+        self.spatial_index = SpatialIndex()
+        # Set whenever classes are replaced, moved or resized; see _current_spatial_index
+        self._spatial_index_stale = True
         self.position_file = ""
+        # Model file given to import_file, recorded in snapshots to detect stale ones
+        self.model_file = None
 
     def import_file(self, file):
-        self.uml_classes, self.relationships = JsonUmlImporter.import_classes_and_relationships(self.json_importer, file)
+        with self.profiler.stage("import", file=file):
+            self.uml_classes, self.relationships = self.json_importer.import_classes_and_relationships(file)
+        self.model_file = file
+        self._spatial_index_stale = True
 
     def import_positions(self, file):
-        self.uml_classes = JsonUmlImporter.import_posittions(self.json_importer, file)
+        with self.profiler.stage("position_load", file=file):
+            self.uml_classes = JsonUmlImporter.import_posittions(self.json_importer, file)
         self.position_file = file
+        self._spatial_index_stale = True
+
+    def save_snapshot(self, file_path: str, artifacts=None):
+        """
+        Writes the built model with its positions and rendered artifacts to
+        a binary snapshot for load_snapshot. Call it after gernate_classes.
+        The snapshot records the model file it was imported from.
+        """
+        if artifacts is None:
+            artifacts = self.required_artifacts()
+        with self.profiler.stage("snapshot_save", file=file_path):
+            write_snapshot(file_path, self.uml_classes, self.relationships, artifacts,
+                           self.json_importer.pinned_ids, self.model_file)
+        self.profiler.add_bytes_written(os.path.getsize(file_path))
+
+    def load_snapshot(self, file_path: str, source_path: str = None) -> bool:
+        """
+        Replaces import_file and gernate_classes: the model is read from a
+        snapshot and its artifacts are read from the mapped file when an
+        exporter needs them. Artifacts the snapshot lacks are rendered.
+
+        With `source_path`, the snapshot is only used when it was built from
+        that model file as it is now. Returns False, leaving the diagram
+        unchanged, when the snapshot is missing, unreadable or stale.
+        """
+        if not os.path.exists(file_path):
+            return False
+        if source_path is not None:
+            try:
+                stored = read_snapshot_source(file_path)
+            except ValueError as e:
+                print(f"Snapshot not used: {e}")
+                return False
+            if stored != source_fingerprint(source_path):
+                print(f"Snapshot {file_path} is out of date with {source_path}, re-importing")
+                return False
+
+        self.json_importer = SnapshotImporter(fallback_loader=self._load_artifact)
+        with self.profiler.stage("snapshot_load", file=file_path):
+            self.uml_classes, self.relationships = self.json_importer.import_classes_and_relationships(file_path)
+        self.model_file = self.json_importer.source["path"] if self.json_importer.source else None
+        self._spatial_index_stale = True
+        return True
+
+    def required_artifacts(self, exporters=None) -> frozenset:
+        """
+        Union of the artifacts the given exporters (default: all configured
+        ones) consume.
+        """
+        artifacts = set()
+        for exporter in (self.export_stage.exporters if exporters is None else exporters):
+            artifacts |= exporter.required_artifacts
+        return frozenset(artifacts)
+
+    def gernate_classes(self, artifacts=None, classes: List[UmlClass] = None):
+        """
+        Renders the artifacts needed by the configured exporters up front.
+        Everything else is rendered lazily on first access.
+        """
+        if artifacts is None:
+            artifacts = self.required_artifacts()
+        if classes is None:
+            classes = self.uml_classes
+
+        generator = self.render_generator
+        with self.profiler.stage("render", classes=len(classes), artifacts=sorted(artifacts)):
+            if self.render_batch and self.render_pool:
+                results = self.render_pool.render_batches(generator, classes, artifacts)
+            elif self.render_batch:
+                results = render_class_batch(generator, classes, artifacts)
+            elif self.render_pool:
+                results = self.render_pool.render(generator, classes, artifacts)
+            else:
+                results = [render_class(generator, element, artifacts) for element in classes]
+
+        self._apply_results(classes, results)
+        self._measure_sizes(classes, artifacts)
+
+    async def gernate_classes_async(self, artifacts=None, classes: List[UmlClass] = None):
+        """
+        gernate_classes for callers running an event loop: all classes render
+        concurrently, bounded by the async generator's renderer.
+        """
+        if artifacts is None:
+            artifacts = self.required_artifacts()
+        if classes is None:
+            classes = self.uml_classes
+
+        with self.profiler.stage("render", classes=len(classes), artifacts=sorted(artifacts)):
+            results = await render_classes_async(self.async_class_generator, classes, artifacts)
+
+        self._apply_results(classes, results)
+        self._measure_sizes(classes, artifacts)
+
+    def _apply_results(self, classes: List[UmlClass], results: list):
+        for element, (png_data, svg_data, code_data) in zip(classes, results):
+            if png_data is not None:
+                element.png_data = png_data
+            if svg_data is not None:
+                self._apply_svg(element, svg_data)
+            if code_data is not None:
+                element.code_data = code_data
+            element.artifact_loader = self._load_artifact
+
+        if self.render_cache:
+            stats = self.render_cache.stats()
+            print(f"Render cache: {stats['hits']} hits, {stats['misses']} misses")
+
+    def _measure_sizes(self, classes: List[UmlClass], artifacts):
+        # Sizes without an SVG render come from one Graphviz layout of all labels
+        if ARTIFACT_SIZE not in artifacts or ARTIFACT_SVG in artifacts or not classes:
+            return
+        with self.profiler.stage("measure", classes=len(classes)):
+            sizes = self.class_generator_graphviz.generate_size_batch(classes)
+        for element, size in zip(classes, sizes):
+            element.size = size
+        self._spatial_index_stale = True
+
+    def export_diagram(self, viewport: Tuple[float, float, float, float] = None, exporters=None):
+        """
+        Runs all exporters, or only the given ones, e.g. [self.exporter_graphviz].
+        Render just what they need with
+        gernate_classes(self.required_artifacts(exporters)). With a `viewport`
+        (left, top, right, bottom) only the classes intersecting it and the
+        relationships between them are exported.
+        """
+        classes, relationships = self.uml_classes, self.export_relationships()
+        if viewport is not None:
+            classes, relationships = self.classes_in_viewport(viewport, relationships)
+
+        with self.profiler.stage("export", classes=len(classes), relationships=len(relationships)):
+            results = self.export_stage.run(classes, relationships, exporters)
+        for result in results:
+            status = "done" if result.ok else "FAILED"
+            print(f"{type(result.exporter).__name__}: {status} in {result.seconds:.2f}s -> {result.output_path}")
+        return results
 
-    def gernate_classes(self):
-        for element in self.uml_classes:
-            png_data = self.class_generator_graphviz.generate_png(element)
-            element.png_data = png_data
+    def build_incremental(self, manifest_path: str = None):
+        """
+        Renders and exports only what changed since the run that wrote the
+        manifest. Falls back to a full build when there is no usable manifest
+        or an output file is missing.
+        """
+        stage = self.export_stage
+        if manifest_path is None:
+            manifest_path = os.path.join(stage.output_dir, stage.output_name + ".manifest.json")
 
-            svg_data = self.class_generator_graphviz.generate_svg(element)
-            element.svg_data = svg_data["svg"]
+        manifest = BuildManifest.load(manifest_path)
+        outputs_exist = all(os.path.exists(stage.output_path(exporter)) for exporter in stage.exporters)
 
-            code_data = self.class_generator_graphviz.generate_graphviz_label(element)
-            element.code_data = code_data
+        if manifest is None or not outputs_exist:
+            print("Incremental build: no previous build found, doing a full build")
+            self.gernate_classes()
+            self.export_diagram()
+            BuildManifest.from_model(self.uml_classes, self.relationships).save(manifest_path)
+            return
 
-            element.size = (svg_data["width"], svg_data["height"])
+        diff = diff_model(manifest, self.uml_classes, self.relationships)
+        print(f"Incremental build: {diff}")
+        if diff.is_empty():
+            return
 
-    def export_diagram(self):
-        self.exporter.export(self.uml_classes, self.relationships, "output/test.drawio")
-        self.exporter_graphviz.export(self.uml_classes, self.relationships, "output/test.gv")
+        # Unchanged classes keep their previous size; only cheap artifacts are rebuilt
+        render_ids = diff.needs_render
+        unchanged = [element for element in self.uml_classes if str(element.class_id) not in render_ids]
+        changed = [element for element in self.uml_classes if str(element.class_id) in render_ids]
+
+        for element in unchanged:
+            element.size = tuple(manifest.classes[str(element.class_id)]["size"])
+        self._spatial_index_stale = True
+
+        artifacts = self.required_artifacts()
+        self.gernate_classes(artifacts - {ARTIFACT_SVG, ARTIFACT_PNG, ARTIFACT_SIZE}, unchanged)
+        self.gernate_classes(artifacts, changed)
+
+        relationships = self.export_relationships()
+        for exporter in stage.exporters:
+            output_path = stage.output_path(exporter)
+            if hasattr(exporter, "patch"):
+                exporter.patch(self.uml_classes, relationships, output_path,
+                               render_ids, diff.moved, diff.removed, diff.relationships_changed)
+            else:
+                exporter.export(self.uml_classes, relationships, output_path)
+
+        BuildManifest.from_model(self.uml_classes, self.relationships).save(manifest_path)
 
     def place(self):
-        self.uml_classes = self.tool.run(self.uml_classes, self.relationships, "diagram.drawio")
+        # The placing tool keeps the index in sync with the classes it moves
+        self._current_spatial_index()
+        with self.profiler.stage("place"):
+            self.uml_classes = self.tool.run(self.uml_classes, self.relationships, "diagram.drawio",
+                                             class_index=self.json_importer.class_index,
+                                             on_update=lambda classes: self.json_importer.save_positions(classes, self.position_file),
+                                             spatial_index=self.spatial_index)
         self.json_importer.save_positions(self.uml_classes, self.position_file)
+        self.lint_overlaps()
+
+    def lint_overlaps(self) -> list:
+        """
+        Prints and returns the pairs of classes whose boxes overlap.
+        """
+        pairs = self._current_spatial_index().overlaps()
+        if not pairs:
+            print("Layout check: no overlapping classes")
+        else:
+            print(f"Layout check: {len(pairs)} overlapping class pairs")
+            for first, second in pairs:
+                print(f"  {first.name} ({first.class_id}) overlaps {second.name} ({second.class_id})")
+        return pairs
+
+    def export_relationships(self) -> List[UmlRelationship]:
+        """
+        The relationships handed to the exporters, after deduplication and
+        transitive pruning.
+        """
+        index = self.json_importer.relationship_index
+        if len(index) != len(self.relationships):
+            index.rebuild(self.relationships)
+
+        if self.prune_transitive:
+            relationships = index.pruned(self.prune_transitive)
+        elif self.dedupe_relationships:
+            relationships = index.unique()
+        else:
+            return self.relationships
+
+        if len(relationships) != len(self.relationships):
+            print(f"Relationships: exporting {len(relationships)} of {len(self.relationships)}")
+        return relationships
+
+    def classes_in_viewport(self, viewport: Tuple[float, float, float, float], relationships: List[UmlRelationship] = None):
+        """
+        Classes intersecting the rectangle (left, top, right, bottom) and the
+        relationships between them, in model order.
+        """
+        if relationships is None:
+            relationships = self.relationships
+        visible_ids = {str(uml_class.class_id) for uml_class in self._current_spatial_index().query(viewport)}
+        classes = [uml_class for uml_class in self.uml_classes if str(uml_class.class_id) in visible_ids]
+        relationships = [rel for rel in relationships
+                         if str(rel.source) in visible_ids and str(rel.destination) in visible_ids]
+        return classes, relationships
+
+    def auto_layout(self, save: bool = True):
+        """
+        Places the classes without a stored position without opening an
+        editor, e.g. for CI runs. Needs the class sizes, so call it after
+        gernate_classes. With `save` the positions file is updated.
+        """
+        with self.profiler.stage("layout"):
+            placed = self.layout_engine.layout(self.uml_classes, self.json_importer.pinned_ids)
+        print(f"Auto layout placed {placed} of {len(self.uml_classes)} classes")
+        self._spatial_index_stale = True
+        self.lint_overlaps()
+        if save and self.position_file:
+            self.json_importer.save_positions(self.uml_classes, self.position_file)
+
+    def optimize_svgs(self, precision: int = 2, report_path: str = None):
+        """
+        Minifies the class SVGs before export and prints the byte savings.
+        Call it after gernate_classes; the report can also be written as JSON.
+        """
+        with self.profiler.stage("optimize_svgs"):
+            report = optimize_classes(self.uml_classes, SvgOptimizer(precision))
+        report.print_summary()
+        if report_path:
+            with open(report_path, 'w') as f:
+                json.dump(report.to_dict(), f, indent=2)
+        return report
+
+    def write_profile(self, report_path: str, trace_path: str = None):
+        """
+        Writes the profiling report as JSON and optionally a Chrome trace.
+        Needs profile=True; peak memory is only reported with profile_memory=True.
+        """
+        self.profiler.write_json(report_path)
+        print(f"Profile report written to {report_path}")
+        if trace_path:
+            self.profiler.write_chrome_trace(trace_path)
+            print(f"Chrome trace written to {trace_path}")
+
+    def close(self):
+        """
+        Stops the PlantUML server and the render pool this diagram created.
+        Lazy artifacts cannot be rendered afterwards.
+        """
+        if self.class_generator.server:
+            self.class_generator.server.close()
+        if self.render_pool and self._owns_render_pool:
+            self.render_pool.close()
+
+    def _apply_svg(self, element: UmlClass, svg_data: dict):
+        element.svg_data = svg_data["svg"]
+        element.label = svg_data["label"]
+        element.size = (svg_data["width"], svg_data["height"])
+        self._spatial_index_stale = True
+
+    def _current_spatial_index(self) -> SpatialIndex:
+        if self._spatial_index_stale or len(self.spatial_index) != len(self.uml_classes):
+            self.spatial_index.rebuild(self.uml_classes)
+            self._spatial_index_stale = False
+        return self.spatial_index
+
+    def _load_artifact(self, element: UmlClass, artifact: str):
+        generator = self.render_generator
+        if artifact == ARTIFACT_SVG:
+            svg_data = generator.generate_svg(element)
+            self._apply_svg(element, svg_data)
+            return svg_data["svg"]
+        if artifact == ARTIFACT_PNG:
+            return generator.generate_png(element)
+        if artifact == ARTIFACT_CODE:
+            return generator.generate_graphviz_label(element)
+        raise ValueError(f"Unknown artifact: {artifact}")
 
     def _extract_svg_size(self, svg_data: str) -> Tuple[float, float]:
         width_match = re.search(r'width="([\d.]+)([a-z]*)"', svg_data)
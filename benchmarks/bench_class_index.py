@@ -0,0 +1,61 @@
+# bench_class_index.py
+#
+# Times position loading and draw.io position sync for growing model sizes.
+# With the id index both should scale linearly with the number of classes.
+#
+#   python -m benchmarks.bench_class_index
+import os
+import sys
+import time
+import tempfile
+
+from core.uml_class import UmlClass
+from importer.json_importer import JsonUmlImporter
+from export.drawio_exporter import DrawioUmlExporter
+from placing_tool.placing_tool import DrawioPositionTool
+
+
+def make_classes(count: int):
+    importer = JsonUmlImporter()
+    for class_id in range(count):
+        uml_class = UmlClass(class_id, f"Class{class_id}", [], False, [], (0.0, 0.0), (10.0, 10.0), "<svg/>", None, None,
+                             geometry=importer.geometry)
+        importer.uml_classes.append(uml_class)
+        importer.class_index.add(uml_class)
+    return importer
+
+
+def bench(count: int, tmp_dir: str):
+    importer = make_classes(count)
+    position_data = [
+        {"id": class_id, "position": {"x": float(class_id), "y": float(class_id)}}
+        for class_id in range(count)
+    ]
+
+    start = time.perf_counter()
+    importer.load_positions(position_data)
+    load_time = time.perf_counter() - start
+
+    drawio_path = os.path.join(tmp_dir, f"bench_{count}.drawio")
+    DrawioUmlExporter().export(importer.uml_classes, [], drawio_path)
+
+    start = time.perf_counter()
+    DrawioPositionTool().update_positions_from_file(importer.uml_classes, drawio_path, importer.class_index)
+    sync_time = time.perf_counter() - start
+
+    return load_time, sync_time
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 2000, 4000, 8000, 16000, 32000]
+
+    print(f"{'classes':>8} {'load_positions':>16} {'per class':>12} {'drawio sync':>14} {'per class':>12}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for count in sizes:
+            load_time, sync_time = bench(count, tmp_dir)
+            print(f"{count:>8} {load_time * 1e3:>13.2f} ms {load_time / count * 1e6:>9.2f} us"
+                  f" {sync_time * 1e3:>11.2f} ms {sync_time / count * 1e6:>9.2f} us")
+
+
+if __name__ == "__main__":
+    main()
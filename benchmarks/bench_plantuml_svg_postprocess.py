@@ -0,0 +1,119 @@
+# bench_plantuml_svg_postprocess.py
+#
+# Compares the single-pass PlantUML SVG post-processing with the previous
+# parse/serialize/parse/serialize path on PlantUML-like class SVGs, and
+# checks that both produce the same output.
+#
+#   python -m benchmarks.bench_plantuml_svg_postprocess [methods ...]
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+
+from class_generators.plantuml_class_generator import PlantUmlClassDiagramGenerator
+
+
+def make_svg(methods: int) -> str:
+    rows = "".join(
+        f'<text fill="#000000" font-family="sans-serif" font-size="14" lengthAdjust="spacing" '
+        f'textLength="{80 + index % 40}" x="14" y="{50 + 17 * index}">method{index}()</text>'
+        for index in range(methods)
+    )
+    height = 48 + 17 * methods
+    return (
+        '<?xml version="1.0" encoding="us-ascii" standalone="no"?>'
+        '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" contentScriptType="application/ecmascript" '
+        'contentStyleType="text/css" height="200px" preserveAspectRatio="none" '
+        'style="width:180px;height:200px;background:#FFFFFF;" version="1.1" viewBox="0 0 180 200" '
+        'width="180px" zoomAndPan="magnify">'
+        '<defs/><g><!--MD5=[0123456789abcdef]\nclass Example--><g id="elem_Example">'
+        f'<rect codeLine="1" fill="#D3D3D3" height="{height}" id="Example" rx="2.5" ry="2.5" '
+        'style="stroke:#000000;stroke-width:0.5;" width="160" x="7" y="7"/>'
+        '<text fill="#000000" font-family="sans-serif" font-size="14" font-weight="bold" lengthAdjust="spacing" '
+        'textLength="60" x="57" y="23.9951">Example</text>'
+        f'{rows}</g><!--SRC=[encoded-source]--></g></svg>'
+    )
+
+
+def legacy_clean_svg(svg_content: str) -> str:
+    """
+    The former PlantUmlClassDiagramGenerator.clean_svg: strips problematic
+    attributes and enforces pt units for Graphviz.
+    """
+    try:
+        root = ET.fromstring(svg_content)
+
+        # Clean up <svg> attributes
+        root.attrib.pop('style', None)
+        root.attrib.pop('zoomAndPan', None)
+        root.attrib.pop('contentScriptType', None)
+        root.attrib.pop('contentStyleType', None)
+
+        # Set width and height with pt unit for Graphviz compatibility
+        width = root.get('width', '').replace('px', '').strip()
+        height = root.get('height', '').replace('px', '').strip()
+        if width:
+            root.set('width', f"{width}pt")
+        if height:
+            root.set('height', f"{height}pt")
+
+        # Remove comments inside SVG
+        for elem in list(root.iter()):
+            if isinstance(elem.tag, str) and elem.tag.startswith('<!--'):
+                root.remove(elem)
+
+        # Remove comment nodes manually (not supported by ElementTree directly)
+        def remove_comments(e):
+            for sub in list(e):
+                if isinstance(sub.tag, str):
+                    remove_comments(sub)
+                elif ET.iselement(sub) and sub.tag is ET.Comment:
+                    e.remove(sub)
+        remove_comments(root)
+
+        return ET.tostring(root, encoding="utf-8").decode("utf-8")
+    except ET.ParseError as e:
+        print("Failed to clean SVG:", e)
+        return svg_content
+
+
+def legacy_adjust_svg(svg_content: str) -> str:
+    """
+    The previous implementation: viewBox pass, serialize, then legacy_clean_svg.
+    """
+    root = ET.fromstring(svg_content)
+
+    rect_x = rect_y = 0
+    rect_width = rect_height = 0
+    for elem in root.iter():
+        if elem.tag.endswith('rect'):
+            rect_x = float(elem.attrib.get('x', 0))
+            rect_y = float(elem.attrib.get('y', 0))
+            rect_width = float(elem.attrib.get('width', 0))
+            rect_height = float(elem.attrib.get('height', 0))
+            break
+
+    root.set('viewBox', f"{rect_x} {rect_y} {rect_width} {rect_height}")
+    root.set('width', str(rect_width))
+    root.set('height', str(rect_height))
+
+    svg_content_modified = ET.tostring(root, encoding="utf-8").decode('utf-8')
+    return legacy_clean_svg(svg_content_modified)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [2, 10, 50]
+    generator = PlantUmlClassDiagramGenerator()
+
+    print(f"{'methods':>8} {'legacy':>12} {'single pass':>12} {'speedup':>8}")
+    for methods in sizes:
+        svg = make_svg(methods)
+        assert generator.adjust_svg(svg) == legacy_adjust_svg(svg), "outputs differ"
+
+        number = max(100, 20000 // (methods + 10))
+        legacy = min(timeit.repeat(lambda: legacy_adjust_svg(svg), number=number, repeat=5)) / number
+        single = min(timeit.repeat(lambda: generator.adjust_svg(svg), number=number, repeat=5)) / number
+        print(f"{methods:>8} {legacy * 1e6:>9.1f} us {single * 1e6:>9.1f} us {legacy / single:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# run_benchmarks.py
+#
+# Times every pipeline stage on synthetic models and appends the results,
+# tagged with the current git commit, to a JSON lines file. Each run is
+# compared with the latest recorded run of another commit.
+#
+#   python -m benchmarks.run_benchmarks --classes 1000 5000 --repeat 3
+#   python -m benchmarks.run_benchmarks --no-render    # without Graphviz, placeholder SVGs
+#
+# The default results file, benchmarks/results.jsonl, is local history and ignored by git.
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+import traceback
+
+from application.uml_app import UmlClassDiagram
+from benchmarks.synthetic_model import write_model
+
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl")
+PLACEHOLDER_SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="120" height="80"><rect width="120" height="80"/></svg>'
+STAGES = ["import_file", "import_positions", "gernate_classes", "export_drawio", "export_graphviz",
+          "update_positions_from_file"]
+
+
+def git_commit() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def use_placeholders(diagram: UmlClassDiagram):
+    for uml_class in diagram.uml_classes:
+        uml_class.svg_data = PLACEHOLDER_SVG
+        uml_class.size = (120.0, 80.0)
+        uml_class.code_data = diagram.class_generator_graphviz.generate_graphviz_label(uml_class)
+
+
+def run_once(options, tmp_dir: str) -> dict:
+    model_path = os.path.join(tmp_dir, "model.json")
+    positions_path = os.path.join(tmp_dir, "positions.json")
+    timings = {}
+
+    def timed(stage, action):
+        start = time.perf_counter()
+        try:
+            action()
+        except Exception as e:
+            print(f"  {stage} failed: {e!r}")
+            traceback.print_exc(limit=1)
+            timings[stage] = None
+            return False
+        timings[stage] = time.perf_counter() - start
+        return True
+
+    # A cold render cache per run, unless the warm path is benchmarked
+    cache_dir = options.cache_dir or os.path.join(tmp_dir, "cache")
+    diagram = UmlClassDiagram(cache_dir=cache_dir, render_workers=options.workers,
+                              streaming_import=options.streaming, output_dir=tmp_dir)
+
+    timed("import_file", lambda: diagram.import_file(model_path))
+    timed("import_positions", lambda: diagram.import_positions(positions_path))
+    if options.no_render:
+        timings["gernate_classes"] = None
+        use_placeholders(diagram)
+    elif not timed("gernate_classes", diagram.gernate_classes):
+        use_placeholders(diagram)
+
+    drawio_path = os.path.join(tmp_dir, "bench.drawio")
+    relationships = diagram.export_relationships()
+    timed("export_drawio", lambda: diagram.exporter.export(diagram.uml_classes, relationships, drawio_path))
+    if options.no_render:
+        timings["export_graphviz"] = None
+    else:
+        timed("export_graphviz", lambda: diagram.exporter_graphviz.export(
+            diagram.uml_classes, relationships, os.path.join(tmp_dir, "bench.gv")))
+    timed("update_positions_from_file", lambda: diagram.tool.update_positions_from_file(
+        diagram.uml_classes, drawio_path, diagram.json_importer.class_index))
+
+    return timings
+
+
+def best_of(runs: list) -> dict:
+    best = {}
+    for stage in STAGES:
+        values = [run[stage] for run in runs if run.get(stage) is not None]
+        best[stage] = min(values) if values else None
+    return best
+
+
+def load_results(file_path: str) -> list:
+    if not os.path.exists(file_path):
+        return []
+    with open(file_path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(record: dict, history: list):
+    """
+    Prints the change against the latest run of another commit with the same parameters.
+    """
+    previous = [entry for entry in history
+                if entry["params"] == record["params"] and entry["commit"] != record["commit"]]
+    if not previous:
+        return
+    baseline = previous[-1]
+    print(f"  vs {baseline['commit']}:")
+    for stage in STAGES:
+        old, new = baseline["stages"].get(stage), record["stages"].get(stage)
+        if old and new:
+            print(f"    {stage:<28} {old * 1e3:>10.1f} ms -> {new * 1e3:>10.1f} ms ({(new - old) / old * 100:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the UML pipeline on synthetic models")
+    parser.add_argument("--classes", type=int, nargs="+", default=[500, 2000])
+    parser.add_argument("--methods", type=int, default=5, help="average methods per class")
+    parser.add_argument("--group-depth", type=int, default=2)
+    parser.add_argument("--groups-per-level", type=int, default=4)
+    parser.add_argument("--density", type=float, default=1.5, help="relationships per class")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size; the best is recorded")
+    parser.add_argument("--workers", type=int, default=1, help="render workers, 0 for one per CPU")
+    parser.add_argument("--streaming", action="store_true", help="use the streaming JSON importer")
+    parser.add_argument("--no-render", action="store_true", help="skip Graphviz and use placeholder SVGs")
+    parser.add_argument("--cache-dir", default=None, help="shared render cache (default: cold per run)")
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--no-record", action="store_true", help="do not append to the results file")
+    options = parser.parse_args(argv)
+    options.workers = options.workers or None
+
+    history = load_results(options.results)
+    revision = git_commit()
+
+    for classes in options.classes:
+        params = {
+            "classes": classes, "methods": options.methods, "group_depth": options.group_depth,
+            "groups_per_level": options.groups_per_level, "density": options.density,
+            "workers": options.workers, "streaming": options.streaming, "no_render": options.no_render,
+        }
+        print(f"{classes} classes:")
+
+        runs = []
+        for _ in range(options.repeat):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                write_model(os.path.join(tmp_dir, "model.json"), os.path.join(tmp_dir, "positions.json"),
+                            classes=classes, methods=options.methods, group_depth=options.group_depth,
+                            groups_per_level=options.groups_per_level, relationship_density=options.density)
+                runs.append(run_once(options, tmp_dir))
+
+        record = {
+            "commit": revision["commit"],
+            "dirty": revision["dirty"],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "params": params,
+            "stages": best_of(runs),
+        }
+        for stage in STAGES:
+            value = record["stages"][stage]
+            print(f"  {stage:<28} " + (f"{value * 1e3:>10.1f} ms" if value is not None else "   skipped"))
+        compare(record, history)
+
+        if not options.no_record:
+            with open(options.results, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+            history.append(record)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
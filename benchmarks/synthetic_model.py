@@ -0,0 +1,104 @@
+# synthetic_model.py
+#
+# Generates models in the JsonUmlImporter schema for benchmarks.
+#
+#   python -m benchmarks.synthetic_model 5000 model.json positions.json
+import sys
+import json
+import random
+
+RELATIONSHIP_TYPES = ["inheritance", "association", "dependency", "aggregation", "composition"]
+
+
+def generate_model(classes: int = 1000, methods: int = 5, group_depth: int = 2, groups_per_level: int = 4,
+                   relationship_density: float = 1.5, seed: int = 0) -> dict:
+    """
+    Returns {"elements": [...], "relationships": [...]} with `classes`
+    classes spread over a tree of `groups_per_level` ** `group_depth` leaf
+    groups and about `relationship_density` relationships per class.
+    """
+    rng = random.Random(seed)
+
+    # Step 1: Nested group elements, like namespaces from the code indexer
+    leaves = []
+
+    def make_groups(display_name, depth):
+        group = {"type": "namespace", "display_name": display_name, "elements": []}
+        if depth == group_depth:
+            leaves.append(group)
+            return group
+        for index in range(groups_per_level):
+            group["elements"].append(make_groups(f"ns{depth}_{index}", depth + 1))
+        return group
+
+    root = make_groups("", 0)
+
+    # Step 2: Classes, distributed round robin over the leaf groups
+    for class_id in range(classes):
+        leaves[class_id % len(leaves)]["elements"].append({
+            "type": "class",
+            "id": class_id,
+            "name": f"Class{class_id}",
+            "is_abstract": rng.random() < 0.1,
+            "methods": [
+                {"name": f"method{class_id}_{index}", "is_pure_virtual": rng.random() < 0.05}
+                for index in range(rng.randint(0, 2 * methods))
+            ],
+        })
+
+    # Step 3: Random relationships, mostly towards lower ids like real code bases
+    relationships = []
+    for _ in range(int(classes * relationship_density)):
+        source = rng.randrange(classes)
+        destination = rng.randrange(max(1, source)) if source and rng.random() < 0.8 else rng.randrange(classes)
+        relationships.append({
+            "source": source,
+            "destination": destination,
+            "type": rng.choice(RELATIONSHIP_TYPES),
+            "access": "public",
+        })
+
+    elements = root["elements"] if group_depth > 0 else [root]
+    return {"elements": elements, "relationships": relationships}
+
+
+def generate_positions(classes: int = 1000, placed_fraction: float = 1.0, seed: int = 0) -> dict:
+    """
+    Positions file for the first `placed_fraction` of the classes, on a grid.
+    """
+    rng = random.Random(seed)
+    columns = max(1, int(classes ** 0.5))
+    entries = []
+    for class_id in range(int(classes * placed_fraction)):
+        entries.append({
+            "id": class_id,
+            "name": f"Class{class_id}",
+            "position": {
+                "x": (class_id % columns) * 300.0 + rng.uniform(0, 20),
+                "y": (class_id // columns) * 250.0 + rng.uniform(0, 20),
+            },
+        })
+    return {"classes": entries}
+
+
+def write_model(model_path: str, positions_path: str = None, **options):
+    """
+    Writes a synthetic model (and optionally its positions file) to disk.
+    """
+    seed = options.get("seed", 0)
+    with open(model_path, 'w') as f:
+        json.dump(generate_model(**options), f)
+    if positions_path:
+        with open(positions_path, 'w') as f:
+            json.dump(generate_positions(options.get("classes", 1000), seed=seed), f)
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("usage: python -m benchmarks.synthetic_model CLASSES MODEL_JSON [POSITIONS_JSON]")
+        sys.exit(1)
+    write_model(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None, classes=int(sys.argv[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# async_renderer.py
+import asyncio
+from typing import List
+
+from application.profiler import get_profiler
+
+
+class AsyncSubprocessRenderer:
+    """
+    Runs renderer processes (dot, plantuml) with asyncio: the source is
+    written to stdin and the image read from stdout, so no temporary files
+    or threads are needed. At most `max_concurrency` processes run at a
+    time; a process that takes longer than `timeout` seconds is killed.
+    """
+
+    def __init__(self, max_concurrency: int = 8, timeout: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = None
+        self._loop = None
+
+    async def run(self, command: List[str], source: bytes) -> bytes:
+        # The semaphore belongs to one event loop; a new loop gets a new one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+
+        async with self._semaphore:
+            with get_profiler().subprocess(command[0], command=" ".join(command)):
+                process = await asyncio.create_subprocess_exec(
+                    *command,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                try:
+                    stdout, stderr = await asyncio.wait_for(process.communicate(source), self.timeout)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+                    raise TimeoutError(f"{command[0]} did not finish within {self.timeout}s")
+                except asyncio.CancelledError:
+                    process.kill()
+                    await process.wait()
+                    raise
+
+        if process.returncode != 0:
+            message = stderr.decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"{command[0]} exited with {process.returncode}: {message}")
+        return stdout
@@ -1,15 +1,58 @@
-import os
-import tempfile
-from graphviz import Digraph
+import struct
 from PIL import Image
 from core.uml_class import UmlClass
-from application.interface import ClassImageGenerator
+from application.interface import ClassImageGenerator, AsyncClassImageGenerator
 from graphviz import Source
+import graphviz
+import io
+import re
+import json
+import math
 import xml.etree.ElementTree as ET
+from class_generators.render_cache import RenderCache
+from class_generators.async_renderer import AsyncSubprocessRenderer
+from application.profiler import get_profiler
+
+# Matches one node group of a batch render, e.g. <g id="uml_12" class="node"> ... </g>
+_BATCH_NODE_RE = re.compile(r'<g id="uml_(\d+)" class="node">(.*?)</g>', re.DOTALL)
+_POINTS_RE = re.compile(r'points="([^"]+)"')
+_GRAPH_TRANSLATE_RE = re.compile(r'<g id="graph0" class="graph" transform="[^"]*translate\(([-\d.]+) ([-\d.]+)\)"')
+
+# Graphviz adds this much padding (pt) around a single-node drawing
+_GRAPH_PAD = 4.0
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def png_size(png_data: bytes):
+    """
+    Width and height of a PNG, read from the IHDR chunk that directly
+    follows the 8-byte signature.
+    """
+    if png_data[:8] == _PNG_SIGNATURE and png_data[12:16] == b"IHDR":
+        return struct.unpack(">II", png_data[16:24])
+    with Image.open(io.BytesIO(png_data)) as img:
+        return img.size
+
 
 class GraphvizClassDiagramGenerator(ClassImageGenerator):
-    def __init__(self, output_folder='class_diagrams'):
+    def __init__(self, output_folder='class_diagrams', cache: RenderCache = None):
         self.output_folder = output_folder
+        self.cache = cache
+        self._graphviz_version = None
+
+    def graphviz_version(self) -> str:
+        """
+        Returns the installed Graphviz version, queried once per generator.
+        """
+        if self._graphviz_version is None:
+            try:
+                self._graphviz_version = ".".join(str(part) for part in graphviz.version())
+            except (graphviz.ExecutableNotFound, RuntimeError):
+                self._graphviz_version = "unknown"
+        return self._graphviz_version
+
+    def _cache_key(self, dot_code: str, fmt: str, batch: bool = False) -> str:
+        # Images cut from a batch render differ slightly from single renders, so they get their own keys
+        return RenderCache.make_key(dot_code, f"batch-{fmt}" if batch else fmt, self.graphviz_version())
 
     def generate_graphviz_code(self, uml_class: UmlClass) -> str:
         methods = "\\l".join(
@@ -42,15 +85,225 @@ class GraphvizClassDiagramGenerator(ClassImageGenerator):
     def generate_svg(self, uml_class: UmlClass):
         dot_code = self.generate_graphviz_code(uml_class)
 
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            dot = Source(dot_code, format='svg', directory=tmpdirname)
-            svg_path = dot.render()
+        key = self._cache_key(dot_code, "svg") if self.cache else None
+        svg_content = self.cache.get_text(key) if key else None
+
+        if svg_content is None:
+            with get_profiler().subprocess("dot", format="svg", class_name=uml_class.name):
+                svg_content = Source(dot_code).pipe(format='svg', encoding='utf-8')
+
+            if key:
+                self.cache.put_text(key, svg_content)
+
+        return self._svg_result(uml_class, dot_code, svg_content)
+
+    def generate_png(self, uml_class: UmlClass):
+        dot_code = self.generate_graphviz_code(uml_class)
+
+        key = self._cache_key(dot_code, "png") if self.cache else None
+        png_data = self.cache.get(key) if key else None
+
+        if png_data is None:
+            with get_profiler().subprocess("dot", format="png", class_name=uml_class.name):
+                png_data = Source(dot_code).pipe(format='png')
+
+            if key:
+                self.cache.put(key, png_data)
+
+        return self._png_result(uml_class, dot_code, png_data)
+
+    def generate_batch_graphviz_code(self, uml_classes: list[UmlClass]) -> str:
+        """
+        Emits the record nodes of all given classes into one DOT document.
+        Node ids carry the list index so the render can be split afterwards.
+        """
+        lines = [
+            "digraph {",
+            '    node [shape=record, fontsize=12, fontname="Helvetica"];',
+        ]
+        for index, uml_class in enumerate(uml_classes):
+            label = self.generate_graphviz_label(uml_class)
+            lines.append(f'    n{index} [id="uml_{index}", label="{label}"];')
+        lines.append("}")
+        return "\n".join(lines)
+
+    def generate_svg_batch(self, uml_classes: list[UmlClass]) -> list[dict]:
+        """
+        Renders all classes with a single Graphviz invocation and splits the
+        resulting SVG into one standalone SVG per class. Returns the same
+        dictionaries as generate_svg, in input order.
+        """
+        results, pending = self._batch_lookup(uml_classes, "svg")
+        if pending:
+            batch_classes = [uml_classes[i] for i in pending]
+            svg_content = self._render_batch(batch_classes, "svg")
+            fragments = self._split_batch_svg(svg_content, batch_classes)
+
+            for batch_index, class_index in enumerate(pending):
+                uml_class = uml_classes[class_index]
+                fragment, bbox = fragments[batch_index]
+                svg = self._standalone_svg(fragment, bbox)
+                dot_code = self.generate_graphviz_code(uml_class)
+                if self.cache:
+                    self.cache.put_text(self._cache_key(dot_code, "svg", batch=True), svg)
+                results[class_index] = self._svg_result(uml_class, dot_code, svg)
+
+        return results
+
+    def generate_png_batch(self, uml_classes: list[UmlClass]) -> list[dict]:
+        """
+        Renders all classes into one PNG and crops the per-class images using
+        the node geometry of the matching SVG render.
+        """
+        results, pending = self._batch_lookup(uml_classes, "png")
+        if pending:
+            batch_classes = [uml_classes[i] for i in pending]
+            svg_content = self._render_batch(batch_classes, "svg")
+            png_content = self._render_batch(batch_classes, "png")
+            fragments = self._split_batch_svg(svg_content, batch_classes)
+
+            svg_width, svg_height = self._extract_svg_size(svg_content)
+            offset_x, offset_y = self._graph_translation(svg_content)
+
+            with Image.open(io.BytesIO(png_content)) as sheet:
+                scale_x = sheet.width / svg_width
+                scale_y = sheet.height / svg_height
+
+                for batch_index, class_index in enumerate(pending):
+                    uml_class = uml_classes[class_index]
+                    _, (min_x, min_y, max_x, max_y) = fragments[batch_index]
+                    box = (
+                        round((min_x + offset_x - _GRAPH_PAD) * scale_x),
+                        round((min_y + offset_y - _GRAPH_PAD) * scale_y),
+                        round((max_x + offset_x + _GRAPH_PAD) * scale_x),
+                        round((max_y + offset_y + _GRAPH_PAD) * scale_y),
+                    )
+                    buffer = io.BytesIO()
+                    sheet.crop(box).save(buffer, format="PNG")
+                    png_data = buffer.getvalue()
+
+                    dot_code = self.generate_graphviz_code(uml_class)
+                    if self.cache:
+                        self.cache.put(self._cache_key(dot_code, "png", batch=True), png_data)
+                    results[class_index] = self._png_result(uml_class, dot_code, png_data)
 
-            with open(svg_path, "r", encoding="utf-8") as svg_file:
-                svg_content = svg_file.read()
+        return results
 
-            width, height = self._extract_svg_size(svg_content)
+    def generate_size_batch(self, uml_classes: list[UmlClass]) -> list[tuple]:
+        """
+        (width, height) of each class box as its SVG render would report
+        them, from one `dot -Tjson` layout of all labels. No image is rendered.
+        """
+        results = [None] * len(uml_classes)
+        pending = []
+        for index, uml_class in enumerate(uml_classes):
+            dot_code = self.generate_graphviz_code(uml_class)
+            data = self.cache.get_text(self._cache_key(dot_code, "size", batch=True)) if self.cache else None
+            if data is None:
+                pending.append(index)
+            else:
+                width, height = data.split()
+                results[index] = (float(width), float(height))
+
+        if pending:
+            batch_classes = [uml_classes[i] for i in pending]
+            layout = json.loads(self._render_batch(batch_classes, "json"))
+            nodes = {node["name"]: node for node in layout.get("objects", ()) if "name" in node}
+
+            for batch_index, class_index in enumerate(pending):
+                node = nodes.get(f"n{batch_index}")
+                if node is None:
+                    uml_class = uml_classes[class_index]
+                    raise ValueError(f"Batch layout produced no node for: {uml_class.name} ({uml_class.class_id})")
+                # Node sizes are in inches; a single-node render adds the graph padding
+                width = round(float(node["width"]) * 72 + 2 * _GRAPH_PAD)
+                height = round(float(node["height"]) * 72 + 2 * _GRAPH_PAD)
+                if self.cache:
+                    dot_code = self.generate_graphviz_code(uml_classes[class_index])
+                    self.cache.put_text(self._cache_key(dot_code, "size", batch=True), f"{width} {height}")
+                results[class_index] = (float(width), float(height))
+
+        return results
+
+    def _batch_lookup(self, uml_classes: list[UmlClass], fmt: str):
+        """
+        Fills results from the cache and returns the indices still to render.
+        """
+        results = [None] * len(uml_classes)
+        pending = []
+        for index, uml_class in enumerate(uml_classes):
+            dot_code = self.generate_graphviz_code(uml_class)
+            data = self.cache.get(self._cache_key(dot_code, fmt, batch=True)) if self.cache else None
+            if data is None:
+                pending.append(index)
+            elif fmt == "svg":
+                results[index] = self._svg_result(uml_class, dot_code, data.decode("utf-8"))
+            else:
+                results[index] = self._png_result(uml_class, dot_code, data)
+        return results, pending
+
+    def _render_batch(self, uml_classes: list[UmlClass], fmt: str):
+        dot_code = self.generate_batch_graphviz_code(uml_classes)
+
+        with get_profiler().subprocess("dot", format=fmt, classes=len(uml_classes)):
+            if fmt in ("svg", "json"):
+                return Source(dot_code).pipe(format=fmt, encoding='utf-8')
+            return Source(dot_code).pipe(format=fmt)
+
+    def _split_batch_svg(self, svg_content: str, uml_classes: list[UmlClass]) -> list:
+        """
+        Returns (fragment, bbox) per class in batch order. The bbox is taken
+        from the node's own polygons, in graph coordinates.
+        """
+        fragments = {}
+        for match in _BATCH_NODE_RE.finditer(svg_content):
+            xs, ys = [], []
+            for points in _POINTS_RE.findall(match.group(2)):
+                for point in points.split():
+                    x, y = point.split(",")
+                    xs.append(float(x))
+                    ys.append(float(y))
+            bbox = (math.floor(min(xs)), math.floor(min(ys)), math.ceil(max(xs)), math.ceil(max(ys)))
+            fragments[int(match.group(1))] = (match.group(0), bbox)
+
+        missing = [uml_class for index, uml_class in enumerate(uml_classes) if index not in fragments]
+        if missing:
+            names = ", ".join(f"{uml_class.name} ({uml_class.class_id})" for uml_class in missing)
+            raise ValueError(f"Batch render produced no node for: {names}")
+        return [fragments[index] for index in range(len(uml_classes))]
+
+    def _graph_translation(self, svg_content: str):
+        match = _GRAPH_TRANSLATE_RE.search(svg_content)
+        if not match:
+            return _GRAPH_PAD, 0.0
+        return float(match.group(1)), float(match.group(2))
+
+    def _standalone_svg(self, fragment: str, bbox) -> str:
+        """
+        Wraps a node fragment into an SVG laid out like a single-node render.
+        """
+        min_x, min_y, max_x, max_y = bbox
+        width = max_x - min_x + 2 * _GRAPH_PAD
+        height = max_y - min_y + 2 * _GRAPH_PAD
+        translate_x = _GRAPH_PAD - min_x
+        translate_y = _GRAPH_PAD - min_y
+
+        return (
+            '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+            f'<svg width="{width:.0f}pt" height="{height:.0f}pt"\n'
+            f' viewBox="0.00 0.00 {width:.2f} {height:.2f}" '
+            'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">\n'
+            f'<g id="graph0" class="graph" transform="scale(1 1) rotate(0) translate({translate_x:g} {translate_y:g})">\n'
+            f'<polygon fill="white" stroke="none" points="{min_x - _GRAPH_PAD:g},{max_y + _GRAPH_PAD:g} '
+            f'{min_x - _GRAPH_PAD:g},{min_y - _GRAPH_PAD:g} {max_x + _GRAPH_PAD:g},{min_y - _GRAPH_PAD:g} '
+            f'{max_x + _GRAPH_PAD:g},{max_y + _GRAPH_PAD:g} {min_x - _GRAPH_PAD:g},{max_y + _GRAPH_PAD:g}"/>\n'
+            f'{fragment}\n'
+            '</g>\n'
+            '</svg>\n'
+        )
 
+    def _svg_result(self, uml_class: UmlClass, dot_code: str, svg_content: str) -> dict:
+        width, height = self._extract_svg_size(svg_content)
         return {
             "svg": svg_content,
             "dot": dot_code,
@@ -59,19 +312,8 @@ class GraphvizClassDiagramGenerator(ClassImageGenerator):
             "label": uml_class.label
         }
 
-    def generate_png(self, uml_class: UmlClass):
-        dot_code = self.generate_graphviz_code(uml_class)
-
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            dot = Source(dot_code, format='png', directory=tmpdirname)
-            png_path = dot.render()
-
-            with open(png_path, "rb") as f:
-                png_data = f.read()
-
-            with Image.open(png_path) as img:
-                width, height = img.size
-
+    def _png_result(self, uml_class: UmlClass, dot_code: str, png_data: bytes) -> dict:
+        width, height = png_size(png_data)
         return {
             "png": png_data,
             "dot": dot_code,
@@ -98,3 +340,41 @@ class GraphvizClassDiagramGenerator(ClassImageGenerator):
             return width, height
         except ET.ParseError:
             return None, None
+
+
+class AsyncGraphvizClassDiagramGenerator(AsyncClassImageGenerator):
+    """
+    Async variant of GraphvizClassDiagramGenerator: pipes the DOT source
+    through `dot` with asyncio, sharing the generator's code generation,
+    render cache and result format.
+    """
+
+    def __init__(self, generator: GraphvizClassDiagramGenerator = None, renderer: AsyncSubprocessRenderer = None,
+                 command: str = "dot"):
+        self.generator = generator or GraphvizClassDiagramGenerator()
+        self.renderer = renderer or AsyncSubprocessRenderer()
+        self.command = command
+
+    def generate_graphviz_label(self, uml_class: UmlClass) -> str:
+        return self.generator.generate_graphviz_label(uml_class)
+
+    async def generate_svg(self, uml_class: UmlClass):
+        dot_code = self.generator.generate_graphviz_code(uml_class)
+        svg_content = (await self._render(dot_code, "svg")).decode("utf-8")
+        return self.generator._svg_result(uml_class, dot_code, svg_content)
+
+    async def generate_png(self, uml_class: UmlClass):
+        dot_code = self.generator.generate_graphviz_code(uml_class)
+        png_data = await self._render(dot_code, "png")
+        return self.generator._png_result(uml_class, dot_code, png_data)
+
+    async def _render(self, dot_code: str, fmt: str) -> bytes:
+        cache = self.generator.cache
+        key = self.generator._cache_key(dot_code, fmt) if cache else None
+        data = cache.get(key) if key else None
+
+        if data is None:
+            data = await self.renderer.run([self.command, f"-T{fmt}"], dot_code.encode("utf-8"))
+            if key:
+                cache.put(key, data)
+        return data
@@ -1,25 +1,22 @@
+import asyncio
 import subprocess
-import tempfile
-import os
-import atexit
 import cairosvg 
 import xml.etree.ElementTree as ET
 from core.uml_class import UmlClass
-from application.interface import ClassImageGenerator
+from application.interface import ClassImageGenerator, AsyncClassImageGenerator
+from class_generators.plantuml_server import PlantUmlPipeServer
+from application.profiler import get_profiler
+from class_generators.async_renderer import AsyncSubprocessRenderer
+from class_generators.graphviz_class_generator import GraphvizClassDiagramGenerator, png_size
+
+# Root attributes PlantUML writes that break embedding the SVG in Graphviz/draw.io
+_DROPPED_SVG_ATTRIBUTES = ("style", "zoomAndPan", "contentScriptType", "contentStyleType")
 
 class PlantUmlClassDiagramGenerator(ClassImageGenerator):
-    def __init__(self, output_folder='class_diagrams'):
+    def __init__(self, output_folder='class_diagrams', server: PlantUmlPipeServer = None):
         self.output_folder = output_folder
-
-        self._temp_files = []
-        atexit.register(self._cleanup_temp_files)
-
-    def _cleanup_temp_files(self):
-        for file_path in self._temp_files:
-            try:
-                os.unlink(file_path)
-            except OSError:
-                pass
+        # Optional long-lived PlantUML process; without it every class starts its own JVM
+        self.server = server
 
     def generate_plantuml(self, uml_class):
         """
@@ -55,20 +52,34 @@ class PlantUmlClassDiagramGenerator(ClassImageGenerator):
         return plantuml_code
 
     def generate_svg_from_puml(self, uml_code):
-        # Write UML code to a temporary .puml file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".puml", mode="w", encoding="utf-8") as puml_file:
-            puml_file.write(uml_code)
-            puml_path = puml_file.name
-            self._temp_files.append(puml_path)
+        if self.server:
+            return self.adjust_svg(self.server.render(uml_code))
+
+        # Pipe the UML code through PlantUML and read the SVG from stdout
+        with get_profiler().subprocess("plantuml", format="svg"):
+            result = subprocess.run(["plantuml", "-pipe", "-tsvg", "-charset", "UTF-8"],
+                                    input=uml_code.encode("utf-8"), capture_output=True, check=True)
 
-        # Generate the SVG file
-        svg_path = puml_path.replace(".puml", ".svg")
-        subprocess.run(["plantuml", "-tsvg", puml_path], capture_output=True)
+        # Parse the SVG and adjust the viewBox
+        return self.adjust_svg(result.stdout.decode("utf-8"))
 
-        # Parse the SVG file and adjust the viewBox
-        with open(svg_path, "r", encoding="utf-8") as svg_file:
-            svg_content = svg_file.read()
+    def generate_svg_batch(self, uml_classes):
+        """
+        Renders many classes at once. With a server all sources are streamed
+        through the same PlantUML process in batches.
+        """
+        uml_codes = [self.generate_plantuml(uml_class) for uml_class in uml_classes]
+        if not self.server:
+            return [self.generate_svg_from_puml(uml_code) for uml_code in uml_codes]
 
+        return [self.adjust_svg(svg_content) for svg_content in self.server.render_many(uml_codes)]
+
+    def adjust_svg(self, svg_content: str) -> str:
+        """
+        Fits the viewBox to the class box and cleans the SVG for embedding,
+        with one parse and one serialization. The parser already drops
+        comments, so no extra pass is needed to remove them.
+        """
         # Parse SVG content with ElementTree
         root = ET.fromstring(svg_content)
 
@@ -87,79 +98,24 @@ class PlantUmlClassDiagramGenerator(ClassImageGenerator):
 
         # Calculate the viewBox based on <rect> dimensions
         viewbox = f"{rect_x} {rect_y} {rect_width} {rect_height}"
-        
-        # Set the new viewBox and width/height attributes to match the <rect> dimensions
-        root.set('viewBox', viewbox)
-        root.set('width', str(rect_width))
-        root.set('height', str(rect_height))
 
-        # Get the modified SVG content
-        svg_content_modified = ET.tostring(root, encoding="utf-8").decode('utf-8')
+        # Set the new viewBox and width/height (in pt for Graphviz) to match the <rect> dimensions
+        root.set('viewBox', viewbox)
+        root.set('width', f"{rect_width}pt")
+        root.set('height', f"{rect_height}pt")
 
-        # claen up
-        svg_content_modified = self.clean_svg(svg_content_modified)
+        # Clean up <svg> attributes
+        for attribute in _DROPPED_SVG_ATTRIBUTES:
+            root.attrib.pop(attribute, None)
 
-        # Save the modified SVG content
-        self._temp_files.append(svg_path)
-        return svg_content_modified 
+        return ET.tostring(root, encoding="utf-8").decode('utf-8')
 
-    def clean_svg(self, svg_content: str) -> str:
-        """
-        Cleans SVG content for compatibility with Graphviz.
-        Strips problematic attributes and enforces unit conventions.
-        """
-        try:
-            root = ET.fromstring(svg_content)
-
-            # Clean up <svg> attributes
-            root.attrib.pop('style', None)
-            root.attrib.pop('zoomAndPan', None)
-            root.attrib.pop('contentScriptType', None)
-            root.attrib.pop('contentStyleType', None)
-            
-            # Set width and height with pt unit for Graphviz compatibility
-            width = root.get('width', '').replace('px', '').strip()
-            height = root.get('height', '').replace('px', '').strip()
-            if width:
-                root.set('width', f"{width}pt")
-            if height:
-                root.set('height', f"{height}pt")
-
-            # Remove comments inside SVG
-            for elem in list(root.iter()):
-                if isinstance(elem.tag, str) and elem.tag.startswith('<!--'):
-                    root.remove(elem)
-
-            # Remove comment nodes manually (not supported by ElementTree directly)
-            def remove_comments(e):
-                for sub in list(e):
-                    if isinstance(sub.tag, str):
-                        remove_comments(sub)
-                    elif ET.iselement(sub) and sub.tag is ET.Comment:
-                        e.remove(sub)
-            remove_comments(root)
-
-            return ET.tostring(root, encoding="utf-8").decode("utf-8")
-        except ET.ParseError as e:
-            print("Failed to clean SVG:", e)
-            return svg_content
-        
     def generate_png_from_puml(self, uml_code):
         # First, generate the SVG content from the UML code
         svg_content = self.generate_svg_from_puml(uml_code)
 
-        # Convert the SVG content to PNG
-        png_path = tempfile.mktemp(suffix=".png")
-        cairosvg.svg2png(bytestring=svg_content.encode('utf-8'), write_to=png_path)
-
-        # Read the PNG file content
-        with open(png_path, "rb") as png_file:
-            png_data = png_file.read()
-
-        # Add the PNG path to the temporary files list
-        self._temp_files.append(png_path)
-
-        return png_data
+        # Convert the SVG content to PNG in memory
+        return cairosvg.svg2png(bytestring=svg_content.encode('utf-8'))
 
     def generate_svg(self, uml_class: UmlClass):
         uml_code = self.generate_plantuml(uml_class)
@@ -172,3 +128,90 @@ class PlantUmlClassDiagramGenerator(ClassImageGenerator):
         png_data = self.generate_png_from_puml(uml_code)
         print("Generated PNG data")
         return png_data
+
+
+class PlantUmlRenderBackend(ClassImageGenerator):
+    """
+    Renders class images with PlantUML in the result format of
+    GraphvizClassDiagramGenerator, so gernate_classes and the render pool can
+    use PlantUML. The Graphviz record label (the code artifact) still comes
+    from `label_generator`.
+    """
+
+    def __init__(self, generator: PlantUmlClassDiagramGenerator, label_generator: GraphvizClassDiagramGenerator):
+        self.generator = generator
+        self.label_generator = label_generator
+
+    def generate_graphviz_label(self, uml_class: UmlClass) -> str:
+        return self.label_generator.generate_graphviz_label(uml_class)
+
+    def generate_svg(self, uml_class: UmlClass):
+        svg_content = self.generator.generate_svg_from_puml(self.generator.generate_plantuml(uml_class))
+        return self._svg_result(uml_class, svg_content)
+
+    def generate_png(self, uml_class: UmlClass):
+        png_data = self.generator.generate_png_from_puml(self.generator.generate_plantuml(uml_class))
+        width, height = png_size(png_data)
+        return {"png": png_data, "width": width, "height": height, "label": self.generate_graphviz_label(uml_class)}
+
+    def generate_svg_batch(self, uml_classes: list[UmlClass]) -> list[dict]:
+        svg_contents = self.generator.generate_svg_batch(uml_classes)
+        return [self._svg_result(uml_class, svg_content) for uml_class, svg_content in zip(uml_classes, svg_contents)]
+
+    def generate_png_batch(self, uml_classes: list[UmlClass]) -> list[dict]:
+        return [self.generate_png(uml_class) for uml_class in uml_classes]
+
+    def close(self):
+        if self.generator.server:
+            self.generator.server.close()
+
+    def _svg_result(self, uml_class: UmlClass, svg_content: str) -> dict:
+        # adjust_svg sets the size of the class box in pt on the root element
+        root = ET.fromstring(svg_content)
+        return {
+            "svg": svg_content,
+            "width": float(root.get('width').replace('pt', '')),
+            "height": float(root.get('height').replace('pt', '')),
+            "label": self.generate_graphviz_label(uml_class),
+        }
+
+
+class AsyncPlantUmlClassDiagramGenerator(AsyncClassImageGenerator):
+    """
+    Async variant of PlantUmlRenderBackend, with the same result format and
+    Graphviz labels. Without a server every class runs its own
+    `plantuml -pipe` process with asyncio; with one the sources are streamed
+    through it. PNGs are converted from the SVG off the event loop.
+    PlantUML renders are not cached, as in the sync backend.
+    """
+
+    def __init__(self, backend: PlantUmlRenderBackend, renderer: AsyncSubprocessRenderer = None,
+                 command: str = "plantuml"):
+        self.backend = backend
+        self.renderer = renderer or AsyncSubprocessRenderer()
+        self.command = command
+
+    def generate_graphviz_label(self, uml_class: UmlClass) -> str:
+        return self.backend.generate_graphviz_label(uml_class)
+
+    async def generate_svg_from_puml(self, uml_code: str) -> str:
+        server = self.backend.generator.server
+        if server:
+            # submit blocks while the server queue is full, so keep it off the event loop
+            future = await asyncio.to_thread(server.submit, uml_code)
+            svg_content = await asyncio.wrap_future(future)
+        else:
+            output = await self.renderer.run([self.command, "-pipe", "-tsvg", "-charset", "UTF-8"],
+                                             uml_code.encode("utf-8"))
+            svg_content = output.decode("utf-8")
+        return self.backend.generator.adjust_svg(svg_content)
+
+    async def generate_svg(self, uml_class: UmlClass):
+        svg_content = await self.generate_svg_from_puml(self.backend.generator.generate_plantuml(uml_class))
+        return self.backend._svg_result(uml_class, svg_content)
+
+    async def generate_png(self, uml_class: UmlClass):
+        svg_content = await self.generate_svg_from_puml(self.backend.generator.generate_plantuml(uml_class))
+        png_data = await asyncio.to_thread(cairosvg.svg2png, bytestring=svg_content.encode('utf-8'))
+        width, height = png_size(png_data)
+        return {"png": png_data, "width": width, "height": height, "label": self.generate_graphviz_label(uml_class)}
@@ -0,0 +1,187 @@
+# plantuml_server.py
+import queue
+import threading
+import subprocess
+from concurrent.futures import Future
+from typing import List
+
+from application.profiler import get_profiler
+
+# Written by PlantUML after every image when started with -pipedelimitor
+_DELIMITER = "___UML_VIEWER_PLANTUML_END___"
+
+
+class PlantUmlPipeServer:
+    """
+    Keeps one long-lived `plantuml -pipe` process and streams many diagram
+    sources through it, so the JVM start-up is paid once instead of per class.
+
+    Requests are queued in a bounded queue and written to PlantUML in batches
+    of up to `batch_size` @startuml blocks. A request that does not produce
+    output within `timeout` seconds fails with TimeoutError and the process
+    is restarted for the next batch.
+    """
+
+    def __init__(self, command: List[str] = None, output_format: str = "svg",
+                 max_queue: int = 64, batch_size: int = 16, timeout: float = 30.0):
+        self.command = list(command or ["plantuml"]) + [
+            "-pipe", f"-t{output_format}", "-charset", "UTF-8", "-pipedelimitor", _DELIMITER
+        ]
+        self.batch_size = batch_size
+        self.timeout = timeout
+
+        self._requests = queue.Queue(maxsize=max_queue)
+        self._outputs = queue.Queue()
+        self._process = None
+        self._reader = None
+        self._worker = None
+        self._closed = False
+        # Guards _worker and _closed; submit is called from render pool threads
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self._start()
+        return self
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+        if worker is not None:
+            self._requests.put(None)
+            worker.join()
+        self._stop_process()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, source: str) -> Future:
+        """
+        Queues one @startuml ... @enduml source. Blocks for at most `timeout`
+        seconds while the queue is full, then raises queue.Full.
+        """
+        future = Future()
+        # Queued under the lock, so no request can land behind close()'s stop marker
+        with self._lock:
+            self._start()
+            self._requests.put((source, future), timeout=self.timeout)
+        return future
+
+    def render(self, source: str) -> str:
+        return self.submit(source).result()
+
+    def render_many(self, sources: List[str]) -> List[str]:
+        futures = [self.submit(source) for source in sources]
+        return [future.result() for future in futures]
+
+    # -------------------------------------------------------------
+
+    def _start(self):
+        # Called with the lock held
+        if self._closed:
+            raise RuntimeError("PlantUML server is closed")
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="plantuml-pipe", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            item = self._requests.get()
+            if item is None:
+                return
+
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._render_batch(batch)
+                    return
+                batch.append(item)
+
+            with get_profiler().subprocess("plantuml -pipe", batch=len(batch)):
+                self._render_batch(batch)
+
+    def _render_batch(self, batch):
+        try:
+            process = self._ensure_process()
+            payload = "\n".join(source for source, _ in batch) + "\n"
+            process.stdin.write(payload.encode("utf-8"))
+            process.stdin.flush()
+        except OSError as e:
+            self._stop_process()
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for index, (_, future) in enumerate(batch):
+            try:
+                output = self._outputs.get(timeout=self.timeout)
+            except queue.Empty:
+                # PlantUML is stuck; fail the rest of the batch and start over
+                self._stop_process(kill=True)
+                for _, pending in batch[index:]:
+                    pending.set_exception(TimeoutError("PlantUML did not respond in time"))
+                return
+
+            if output is None:
+                self._stop_process()
+                for _, pending in batch[index:]:
+                    pending.set_exception(RuntimeError("PlantUML process exited unexpectedly"))
+                return
+
+            future.set_result(output)
+
+    def _ensure_process(self):
+        if self._process is None or self._process.poll() is not None:
+            self._stop_process()
+            self._outputs = queue.Queue()
+            self._process = subprocess.Popen(
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            self._reader = threading.Thread(
+                target=self._read_outputs, args=(self._process, self._outputs),
+                name="plantuml-pipe-reader", daemon=True
+            )
+            self._reader.start()
+        return self._process
+
+    def _read_outputs(self, process, outputs):
+        lines = []
+        for raw_line in process.stdout:
+            line = raw_line.decode("utf-8").rstrip("\r\n")
+            if line.endswith(_DELIMITER):
+                # The delimiter may directly follow the image without a newline
+                lines.append(line[:-len(_DELIMITER)])
+                outputs.put("".join(lines))
+                lines = []
+            else:
+                lines.append(line + "\n")
+        outputs.put(None)
+
+    def _stop_process(self, kill: bool = False):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if kill:
+            process.kill()
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
@@ -0,0 +1,219 @@
+# render_cache.py
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    """
+    Persistent, content-addressed cache for rendered class images.
+
+    Entries are stored as one file per key below `cache_dir` and evicted in
+    least-recently-used order once the total size exceeds `max_bytes`.
+    The access order survives restarts because hits refresh the file mtime.
+
+    A copy sent to a worker process does not evict; it records its hits,
+    misses and accessed entries, which the parent collects with
+    take_activity and applies with merge_activity.
+    """
+
+    def __init__(self, cache_dir: str = ".uml_render_cache", max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, oldest first
+        self._total_bytes = 0
+        self._index_loaded = False
+        # (key, size) of the entries read or written in a worker process, oldest first
+        self._journal = None
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __getstate__(self):
+        # Only the configuration travels to worker processes; the parent
+        # keeps the index and evicts, see take_activity.
+        return {"cache_dir": self.cache_dir, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["cache_dir"], state["max_bytes"])
+        self._journal = []
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """
+        Builds a cache key from the render inputs (DOT code, format, tool version, ...).
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, str):
+                part = part.encode("utf-8")
+            elif not isinstance(part, bytes):
+                part = repr(part).encode("utf-8")
+            digest.update(len(part).to_bytes(8, "little"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """
+        Returns the cached bytes for `key`, or None on a miss.
+        """
+        path = self._path_for(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, None)
+        except OSError:
+            with self._lock:
+                self._forget(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((key, len(data)))
+            elif key in self._entries:
+                self._entries.move_to_end(key)
+            elif self._index_loaded:
+                self._entries[key] = len(data)
+                self._total_bytes += len(data)
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        path = self._path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write atomically so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((key, len(data)))
+                return
+            self._ensure_index()
+            self._forget(key)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def get_text(self, key: str):
+        data = self.get(key)
+        return data.decode("utf-8") if data is not None else None
+
+    def put_text(self, key: str, text: str):
+        self.put(key, text.encode("utf-8"))
+
+    def take_activity(self) -> dict:
+        """
+        Hits, misses and accessed entries recorded since the last call, for
+        merge_activity in the parent process. Resets them.
+        """
+        with self._lock:
+            activity = {"hits": self.hits, "misses": self.misses, "entries": self._journal or []}
+            self.hits = self.misses = 0
+            if self._journal is not None:
+                self._journal = []
+            return activity
+
+    def merge_activity(self, activity: dict):
+        """
+        Counts the hits and misses of a worker process and records its
+        accessed entries as most recently used, evicting if needed.
+        """
+        with self._lock:
+            self.hits += activity["hits"]
+            self.misses += activity["misses"]
+            if not activity["entries"]:
+                return
+            self._ensure_index()
+            for key, size in activity["entries"]:
+                self._forget(key)
+                self._entries[key] = size
+                self._total_bytes += size
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._ensure_index()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._ensure_index()
+            for key in list(self._entries):
+                self._remove_file(key)
+            self._entries.clear()
+            self._total_bytes = 0
+
+    # -------------------------------------------------------------
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _ensure_index(self):
+        # Called with the lock held
+        if self._index_loaded:
+            return
+        self._index_loaded = True
+
+        found = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, entry.name, stat.st_size))
+
+        self._entries.clear()
+        self._total_bytes = 0
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+
+        self._evict()
+
+    def _forget(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._remove_file(key)
+            self.evictions += 1
+
+    def _remove_file(self, key: str):
+        try:
+            os.unlink(self._path_for(key))
+        except OSError:
+            pass
@@ -0,0 +1,139 @@
+# svg_optimizer.py
+import re
+from collections import Counter
+from typing import List
+
+from core.uml_class import UmlClass
+
+_PROLOG_RE = re.compile(r'<\?xml[^>]*\?>\s*')
+_DOCTYPE_RE = re.compile(r'<!DOCTYPE[^>\[]*(\[[^\]]*\])?\s*>\s*', re.IGNORECASE)
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+# Indentation between tags; whitespace on a single line may be part of a text
+_LAYOUT_WHITESPACE_RE = re.compile(r'>\s*\n\s*<')
+_GEOMETRY_ATTRIBUTE_RE = re.compile(
+    r'(\s(?:d|points|x|y|x1|y1|x2|y2|cx|cy|r|rx|ry|width|height|transform|viewBox|textLength|font-size|stroke-width)=")'
+    r'([^"]*)(")'
+)
+_DECIMAL_RE = re.compile(r'-?\d*\.\d+(?:[eE][-+]?\d+)?')
+_START_TAG_RE = re.compile(r'<([A-Za-z][\w:.-]*)(\s[^<>]*?)?\s*(/?)>')
+_ROOT_TAG_RE = re.compile(r'<((?:[\w.-]+:)?)svg\b[^>]*>')
+_ATTRIBUTE_WHITESPACE_RE = re.compile(r'\s+')
+_STYLE_ATTRIBUTE_RE = re.compile(r'\sstyle="([^"]*)"')
+_CLASS_ATTRIBUTE_RE = re.compile(r'\sclass="')
+
+
+class SvgOptimizer:
+    """
+    Shrinks class SVGs before they are embedded in a diagram: drops the XML
+    prolog, DOCTYPE, comments and layout whitespace, rounds coordinates to
+    `precision` decimals and moves style attributes that repeat within an
+    SVG into one <style> block.
+
+    Works on the text, so namespaces and attribute order stay as written
+    by the renderer.
+    """
+
+    def __init__(self, precision: int = 2, dedupe_styles: bool = True):
+        self.precision = precision
+        self.dedupe_styles = dedupe_styles
+
+    def optimize(self, svg_content: str) -> str:
+        svg_content = _PROLOG_RE.sub('', svg_content)
+        svg_content = _DOCTYPE_RE.sub('', svg_content)
+        svg_content = _COMMENT_RE.sub('', svg_content)
+        svg_content = _LAYOUT_WHITESPACE_RE.sub('><', svg_content)
+        svg_content = _GEOMETRY_ATTRIBUTE_RE.sub(self._round_attribute, svg_content)
+        return self._rewrite_tags(svg_content).strip()
+
+    # -------------------------------------------------------------
+
+    def _round_attribute(self, match) -> str:
+        return match.group(1) + _DECIMAL_RE.sub(self._round_number, match.group(2)) + match.group(3)
+
+    def _round_number(self, match) -> str:
+        text = f"{float(match.group(0)):.{self.precision}f}".rstrip('0').rstrip('.')
+        return "0" if text in ("-0", "") else text
+
+    def _rewrite_tags(self, svg_content: str) -> str:
+        """
+        Collapses whitespace inside start tags and replaces repeated style
+        attributes by classes.
+        """
+        class_names = {}
+        if self.dedupe_styles:
+            counts = Counter(_STYLE_ATTRIBUTE_RE.findall(svg_content))
+            repeated = [style for style, count in counts.items() if count > 1]
+            class_names = {style: f"u{index}" for index, style in enumerate(repeated)}
+
+        def replace_tag(match) -> str:
+            attributes = _ATTRIBUTE_WHITESPACE_RE.sub(" ", match.group(2) or "")
+            style = _STYLE_ATTRIBUTE_RE.search(attributes) if class_names else None
+            # Elements with their own class keep the inline style
+            if style is not None and style.group(1) in class_names and not _CLASS_ATTRIBUTE_RE.search(attributes):
+                attributes = attributes[:style.start()] + f' class="{class_names[style.group(1)]}"' + attributes[style.end():]
+            return f"<{match.group(1)}{attributes}{match.group(3)}>"
+
+        svg_content = _START_TAG_RE.sub(replace_tag, svg_content)
+        if not class_names:
+            return svg_content
+
+        # The style block goes first inside the root element, in the root's namespace prefix
+        root = _ROOT_TAG_RE.search(svg_content)
+        if root is None:
+            return svg_content
+        prefix = root.group(1)
+        rules = "".join(f".{name}{{{style}}}" for style, name in class_names.items())
+        return svg_content[:root.end()] + f"<{prefix}style>{rules}</{prefix}style>" + svg_content[root.end():]
+
+
+class SvgOptimizationReport:
+    def __init__(self):
+        # (class_id, name, bytes before, bytes after)
+        self.entries = []
+
+    def add(self, uml_class: UmlClass, before: int, after: int):
+        self.entries.append((uml_class.class_id, uml_class.name, before, after))
+
+    @property
+    def bytes_before(self) -> int:
+        return sum(entry[2] for entry in self.entries)
+
+    @property
+    def bytes_after(self) -> int:
+        return sum(entry[3] for entry in self.entries)
+
+    def to_dict(self) -> dict:
+        return {
+            "classes": [
+                {"id": class_id, "name": name, "before": before, "after": after, "saved": before - after}
+                for class_id, name, before, after in self.entries
+            ],
+            "bytes_before": self.bytes_before,
+            "bytes_after": self.bytes_after,
+            "saved": self.bytes_before - self.bytes_after,
+        }
+
+    def print_summary(self, top: int = 5):
+        before, after = self.bytes_before, self.bytes_after
+        percent = (before - after) / before * 100 if before else 0.0
+        print(f"SVG optimization: {before} -> {after} bytes ({before - after} saved, {percent:.1f}%) "
+              f"over {len(self.entries)} classes")
+        largest = sorted(self.entries, key=lambda entry: entry[2] - entry[3], reverse=True)[:top]
+        for class_id, name, before, after in largest:
+            print(f"  {name} ({class_id}): {before} -> {after} bytes")
+
+
+def optimize_classes(classes: List[UmlClass], optimizer: SvgOptimizer = None) -> SvgOptimizationReport:
+    """
+    Replaces the SVG of every class with its optimized form.
+    """
+    optimizer = optimizer or SvgOptimizer()
+    report = SvgOptimizationReport()
+    for uml_class in classes:
+        svg_content = uml_class.svg_data
+        if not svg_content:
+            continue
+        optimized = optimizer.optimize(svg_content)
+        uml_class.svg_data = optimized
+        report.add(uml_class, len(svg_content.encode("utf-8")), len(optimized.encode("utf-8")))
+    return report
@@ -0,0 +1,183 @@
+#relationship_index.py
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from core.uml_relationshpi import UmlRelationship
+
+
+class RelationshipIndex:
+    """
+    Adjacency lists of the model's relationships by source, destination
+    and type. Class ids are keyed by their string form, like UmlClassIndex.
+    """
+
+    def __init__(self, relationships: Iterable[UmlRelationship] = ()):
+        self._relationships: List[UmlRelationship] = []
+        self._by_source: Dict[str, List[UmlRelationship]] = {}
+        self._by_destination: Dict[str, List[UmlRelationship]] = {}
+        self._by_type: Dict[str, List[UmlRelationship]] = {}
+        for relationship in relationships:
+            self.add(relationship)
+
+    def add(self, relationship: UmlRelationship):
+        self._relationships.append(relationship)
+        self._by_source.setdefault(str(relationship.source), []).append(relationship)
+        self._by_destination.setdefault(str(relationship.destination), []).append(relationship)
+        self._by_type.setdefault(relationship.type, []).append(relationship)
+
+    def rebuild(self, relationships: Iterable[UmlRelationship]):
+        self._relationships.clear()
+        self._by_source.clear()
+        self._by_destination.clear()
+        self._by_type.clear()
+        for relationship in relationships:
+            self.add(relationship)
+
+    def by_source(self, class_id) -> List[UmlRelationship]:
+        return self._by_source.get(str(class_id), [])
+
+    def by_destination(self, class_id) -> List[UmlRelationship]:
+        return self._by_destination.get(str(class_id), [])
+
+    def by_type(self, relationship_type: str) -> List[UmlRelationship]:
+        return self._by_type.get(relationship_type, [])
+
+    def unique(self) -> List[UmlRelationship]:
+        """
+        Relationships without parallel duplicates: the first relationship
+        of each (source, destination, type, label) is kept, in model order.
+        Parallel relationships with different labels are all kept.
+        """
+        seen: Set[Tuple[str, str, str, str]] = set()
+        unique = []
+        for relationship in self._relationships:
+            key = (str(relationship.source), str(relationship.destination), relationship.type,
+                   relationship.label)
+            if key not in seen:
+                seen.add(key)
+                unique.append(relationship)
+        return unique
+
+    def pruned(self, transitive_types: Iterable[str] = ("inheritance", "dependency")) -> List[UmlRelationship]:
+        """
+        Unique relationships without the edges of `transitive_types` that are
+        implied by a longer path of the same type, e.g. A -> C when A -> B -> C
+        exists. Reachability within each type is preserved: cycles are
+        collapsed first and only edges between them are pruned.
+        """
+        relationships = self.unique()
+        redundant: Set[int] = set()
+
+        for relationship_type in set(transitive_types):
+            edges = [rel for rel in relationships if rel.type == relationship_type]
+            redundant |= self._transitive_edges(edges)
+
+        return [rel for rel in relationships if id(rel) not in redundant]
+
+    def __iter__(self) -> Iterator[UmlRelationship]:
+        return iter(self._relationships)
+
+    def __len__(self) -> int:
+        return len(self._relationships)
+
+    # -------------------------------------------------------------
+
+    def _transitive_edges(self, edges: List[UmlRelationship]) -> Set[int]:
+        successors: Dict[str, List[str]] = {}
+        for rel in edges:
+            successors.setdefault(str(rel.source), []).append(str(rel.destination))
+
+        # Step 1: Collapse cycles; edges inside a component are never redundant
+        component = self._components(successors)
+
+        # Step 2: Edges between components. Of several node pairs joining the same two
+        # components only the first is needed; parallel edges of that pair are all kept.
+        outgoing: Dict[int, Dict[int, Tuple[str, str]]] = {}
+        redundant = set()
+        for rel in edges:
+            source, destination = str(rel.source), str(rel.destination)
+            source_component, destination_component = component[source], component[destination]
+            if source_component == destination_component:
+                continue
+            pair = outgoing.setdefault(source_component, {}).setdefault(destination_component,
+                                                                        (source, destination))
+            if pair != (source, destination):
+                redundant.add(id(rel))
+
+        def reached_children(child: int, children: Set[int]) -> Set[int]:
+            # The other children that `child` reaches in the component DAG.
+            # The search stops as soon as all of them are found.
+            targets = children - {child}
+            found = set()
+            visited = {child}
+            stack = [child]
+            while stack and len(found) < len(targets):
+                for successor in outgoing.get(stack.pop(), ()):
+                    if successor not in visited:
+                        visited.add(successor)
+                        stack.append(successor)
+                        if successor in targets:
+                            found.add(successor)
+            return found
+
+        # Step 3: Transitive reduction of the component DAG, which is unique, so all
+        # edges implied by a longer path can be dropped at once
+        implied = set()
+        for source_component, children in outgoing.items():
+            if len(children) < 2:
+                continue
+            child_set = set(children)
+            for child in child_set:
+                implied.update(children[reached] for reached in reached_children(child, child_set))
+
+        for rel in edges:
+            if (str(rel.source), str(rel.destination)) in implied:
+                redundant.add(id(rel))
+        return redundant
+
+    @staticmethod
+    def _components(successors: Dict[str, List[str]]) -> Dict[str, int]:
+        """
+        Strongly connected component number of every node (iterative Tarjan).
+        """
+        component: Dict[str, int] = {}
+        order: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+        count = 0
+        nodes = set(successors)
+        for targets in successors.values():
+            nodes.update(targets)
+
+        for root in nodes:
+            if root in order:
+                continue
+            order[root] = low[root] = len(order)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(successors.get(root, ())))]
+            while work:
+                node, pending = work[-1]
+                for successor in pending:
+                    if successor not in order:
+                        order[successor] = low[successor] = len(order)
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, iter(successors.get(successor, ()))))
+                        break
+                    if successor in on_stack:
+                        low[node] = min(low[node], order[successor])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == order[node]:
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component[member] = count
+                            if member == node:
+                                break
+                        count += 1
+        return component
@@ -0,0 +1,138 @@
+#spatial_index.py
+import math
+from typing import Dict, Iterable, List, Set, Tuple
+
+from core.uml_class import UmlClass
+
+Rect = Tuple[float, float, float, float]   # (left, top, right, bottom) in draw.io coordinates
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the placed classes.
+
+    Every class is registered in all grid cells its box touches, so
+    rectangle queries and overlap checks only look at nearby classes
+    instead of scanning the whole model. Classes are keyed by
+    str(class_id), like UmlClassIndex.
+    """
+
+    def __init__(self, classes: Iterable[UmlClass] = (), cell_size: float = 256.0):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._rects: Dict[str, Rect] = {}
+        self._classes: Dict[str, UmlClass] = {}
+        for uml_class in classes:
+            self.add(uml_class)
+
+    def add(self, uml_class: UmlClass):
+        key = str(uml_class.class_id)
+        if key in self._rects:
+            self._unlink(key)
+        rect = self._class_rect(uml_class)
+        self._rects[key] = rect
+        self._classes[key] = uml_class
+        for cell in self._cells_for(rect):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def update(self, uml_class: UmlClass):
+        """
+        Re-registers a class after its position or size changed.
+        """
+        key = str(uml_class.class_id)
+        rect = self._class_rect(uml_class)
+        if self._rects.get(key) == rect:
+            return
+        self.add(uml_class)
+
+    def remove(self, class_id):
+        key = str(class_id)
+        if key in self._rects:
+            self._unlink(key)
+            del self._rects[key]
+            del self._classes[key]
+
+    def rebuild(self, classes: Iterable[UmlClass]):
+        self._cells.clear()
+        self._rects.clear()
+        self._classes.clear()
+        for uml_class in classes:
+            self.add(uml_class)
+
+    def query(self, rect: Rect) -> List[UmlClass]:
+        """
+        Classes whose box intersects `rect`, in no particular order.
+        """
+        found = set()
+        first_col, first_row, last_col, last_row = self._cell_range(rect)
+        if (last_col - first_col + 1) * (last_row - first_row + 1) > len(self._cells):
+            # Large rectangles: visit the occupied cells instead of every covered one
+            for (col, row), keys in self._cells.items():
+                if first_col <= col <= last_col and first_row <= row <= last_row:
+                    found |= keys
+        else:
+            for cell in self._cells_for(rect):
+                found |= self._cells.get(cell, set())
+        return [self._classes[key] for key in found if self._intersects(self._rects[key], rect)]
+
+    def overlaps(self) -> List[Tuple[UmlClass, UmlClass]]:
+        """
+        All pairs of classes whose boxes overlap. Touching edges do not count.
+        """
+        pairs = set()
+        for keys in self._cells.values():
+            if len(keys) < 2:
+                continue
+            ordered = sorted(keys)
+            for i, first in enumerate(ordered):
+                first_rect = self._rects[first]
+                for second in ordered[i + 1:]:
+                    if (first, second) not in pairs and self._intersects(first_rect, self._rects[second]):
+                        pairs.add((first, second))
+        return [(self._classes[first], self._classes[second]) for first, second in sorted(pairs)]
+
+    def bounds(self) -> Rect:
+        if not self._rects:
+            return (0.0, 0.0, 0.0, 0.0)
+        return (
+            min(rect[0] for rect in self._rects.values()),
+            min(rect[1] for rect in self._rects.values()),
+            max(rect[2] for rect in self._rects.values()),
+            max(rect[3] for rect in self._rects.values()),
+        )
+
+    def __contains__(self, class_id) -> bool:
+        return str(class_id) in self._rects
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    # -------------------------------------------------------------
+
+    def _class_rect(self, uml_class: UmlClass) -> Rect:
+        x, y = uml_class.position
+        width, height = uml_class.size
+        return (x, y, x + width, y + height)
+
+    def _cell_range(self, rect: Rect) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return (math.floor(rect[0] / size), math.floor(rect[1] / size),
+                math.floor(rect[2] / size), math.floor(rect[3] / size))
+
+    def _cells_for(self, rect: Rect):
+        first_col, first_row, last_col, last_row = self._cell_range(rect)
+        for col in range(first_col, last_col + 1):
+            for row in range(first_row, last_row + 1):
+                yield (col, row)
+
+    def _unlink(self, key: str):
+        for cell in self._cells_for(self._rects[key]):
+            keys = self._cells.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._cells[cell]
+
+    @staticmethod
+    def _intersects(first: Rect, second: Rect) -> bool:
+        return first[0] < second[2] and second[0] < first[2] and first[1] < second[3] and second[1] < first[3]
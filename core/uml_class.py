@@ -1,7 +1,79 @@
 #uml_class.py
+import threading
 from typing import List, Tuple
 
+from core.uml_geometry import GeometryStore
+
+# Artifact names used by exporters to declare what they consume
+ARTIFACT_SVG = "svg"
+ARTIFACT_PNG = "png"
+ARTIFACT_CODE = "code"
+ALL_ARTIFACTS = frozenset({ARTIFACT_SVG, ARTIFACT_PNG, ARTIFACT_CODE})
+# Only the class size, measured without rendering an image; the SVG render sets it too
+ARTIFACT_SIZE = "size"
+
+# (id(instance), artifact) -> [lock, waiters] for the artifacts being loaded right now
+_loading = {}
+_loading_lock = threading.Lock()
+
+
+class LazyArtifact:
+    """
+    Rendered artifact that is computed by the class's artifact_loader on
+    first access when it has not been set explicitly. Concurrent first
+    accesses from several threads run the loader once.
+    """
+    def __init__(self, artifact: str):
+        self.artifact = artifact
+
+    def __set_name__(self, owner, name):
+        self.attribute = "_" + name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = getattr(instance, self.attribute)
+        if value is None and instance.artifact_loader is not None:
+            value = self._load(instance)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.attribute, value)
+
+    def _load(self, instance):
+        key = (id(instance), self.artifact)
+        with _loading_lock:
+            entry = _loading.setdefault(key, [threading.RLock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                # Another thread may have loaded it while this one waited
+                value = getattr(instance, self.attribute)
+                if value is None and instance.artifact_loader is not None:
+                    value = instance.artifact_loader(instance, self.artifact)
+                    setattr(instance, self.attribute, value)
+                return value
+        finally:
+            with _loading_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del _loading[key]
+
+
 class UmlClass:
+    """
+    A class of the model. Position and size are a view into a shared
+    GeometryStore row; pass the importer's store to keep them columnar.
+    """
+    __slots__ = (
+        "class_id", "name", "methods", "is_abstract", "groups", "label", "artifact_loader",
+        "_svg_data", "_png_data", "_code_data", "_geometry", "_row",
+    )
+
+    svg_data = LazyArtifact(ARTIFACT_SVG)
+    png_data = LazyArtifact(ARTIFACT_PNG)
+    code_data = LazyArtifact(ARTIFACT_CODE)
+
     def __init__(self, 
                  class_id: int, 
                  name: str, 
@@ -12,15 +84,58 @@ class UmlClass:
                  size: Tuple[float, float], 
                  svg_data,
                  png_data,
-                 code_data):
+                 code_data,
+                 geometry: GeometryStore = None):
         
         self.class_id = class_id
         self.name = name
         self.methods = methods
         self.is_abstract = is_abstract
         self.groups = groups
-        self.position = position
-        self.size = size
+        self.label = None
+        self._geometry = geometry if geometry is not None else GeometryStore()
+        self._row = self._geometry.allocate(position, size)
+        # Callable (uml_class, artifact) -> value, used for artifacts left as None
+        self.artifact_loader = None
         self.svg_data = svg_data
         self.png_data = png_data
         self.code_data = code_data
+
+    @property
+    def position(self) -> Tuple[float, float]:
+        return self._geometry.get_position(self._row)
+
+    @position.setter
+    def position(self, position: Tuple[float, float]):
+        self._geometry.set_position(self._row, position)
+
+    @property
+    def size(self) -> Tuple[float, float]:
+        return self._geometry.get_size(self._row)
+
+    @size.setter
+    def size(self, size: Tuple[float, float]):
+        self._geometry.set_size(self._row, size)
+
+    def __getstate__(self):
+        # Ship only this class's own geometry, not the whole shared store,
+        # and drop the loader which is bound to the owning pipeline
+        return {
+            "class_id": self.class_id,
+            "name": self.name,
+            "methods": self.methods,
+            "is_abstract": self.is_abstract,
+            "groups": self.groups,
+            "label": self.label,
+            "position": self.position,
+            "size": self.size,
+            "svg_data": self._svg_data,
+            "png_data": self._png_data,
+            "code_data": self._code_data,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state["class_id"], state["name"], state["methods"], state["is_abstract"],
+                      state["groups"], state["position"], state["size"],
+                      state["svg_data"], state["png_data"], state["code_data"])
+        self.label = state["label"]
@@ -0,0 +1,38 @@
+#uml_class_index.py
+from typing import Dict, Iterable, Optional
+
+from core.uml_class import UmlClass
+
+
+class UmlClassIndex:
+    """
+    O(1) lookup of UmlClass objects by id.
+
+    Ids are keyed by their string form so JSON ids (int or str) and draw.io
+    cell ids (always str) resolve to the same class.
+    """
+
+    def __init__(self, classes: Iterable[UmlClass] = ()):
+        self._classes: Dict[str, UmlClass] = {}
+        for uml_class in classes:
+            self.add(uml_class)
+
+    def add(self, uml_class: UmlClass):
+        self._classes[str(uml_class.class_id)] = uml_class
+
+    def remove(self, class_id):
+        self._classes.pop(str(class_id), None)
+
+    def get(self, class_id) -> Optional[UmlClass]:
+        return self._classes.get(str(class_id))
+
+    def rebuild(self, classes: Iterable[UmlClass]):
+        self._classes.clear()
+        for uml_class in classes:
+            self.add(uml_class)
+
+    def __contains__(self, class_id) -> bool:
+        return str(class_id) in self._classes
+
+    def __len__(self) -> int:
+        return len(self._classes)
@@ -0,0 +1,61 @@
+#uml_geometry.py
+from array import array
+from typing import Tuple
+
+
+class GeometryStore:
+    """
+    Columnar storage for class positions and sizes.
+
+    Each class owns one row; the coordinates live in four packed float
+    arrays instead of two tuples per class.
+    """
+    __slots__ = ("x", "y", "width", "height")
+
+    def __init__(self):
+        self.x = array("d")
+        self.y = array("d")
+        self.width = array("d")
+        self.height = array("d")
+
+    def allocate(self, position: Tuple[float, float], size: Tuple[float, float]) -> int:
+        self.x.append(position[0])
+        self.y.append(position[1])
+        self.width.append(size[0])
+        self.height.append(size[1])
+        return len(self.x) - 1
+
+    def get_position(self, row: int) -> Tuple[float, float]:
+        return (self.x[row], self.y[row])
+
+    def set_position(self, row: int, position: Tuple[float, float]):
+        self.x[row] = position[0]
+        self.y[row] = position[1]
+
+    def get_size(self, row: int) -> Tuple[float, float]:
+        return (self.width[row], self.height[row])
+
+    def set_size(self, row: int, size: Tuple[float, float]):
+        # Renderers may report an unknown size as (None, None)
+        self.width[row] = size[0] if size[0] is not None else 0.0
+        self.height[row] = size[1] if size[1] is not None else 0.0
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+
+class GroupPathTable:
+    """
+    Interns group paths so all classes of a group share one tuple.
+    """
+    __slots__ = ("_paths",)
+
+    def __init__(self):
+        self._paths = {}
+
+    def intern(self, group_path) -> tuple:
+        group_path = tuple(group_path)
+        return self._paths.setdefault(group_path, group_path)
+
+    def __len__(self) -> int:
+        return len(self._paths)
@@ -1,5 +1,7 @@
 #uml_relationship.py
 class UmlRelationship:
+    __slots__ = ("source", "destination", "type", "access", "label")
+
     def __init__(self, source, destination, relationship_type, access, label=None):
         self.source = source
         self.destination = destination
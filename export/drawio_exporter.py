@@ -1,46 +1,257 @@
 # drawio_exporter.py
 import base64
+import zlib
+import urllib.parse
 import xml.etree.ElementTree as ET
+from collections import Counter
 
 from application.interface import UmlExporter
-from core.uml_class import UmlClass
+from core.uml_class import UmlClass, ARTIFACT_SVG
 from core.uml_relationshpi import UmlRelationship
 
+DIAGRAM_NAME = "UML Class Diagram"
+CLASS_STYLE = "rounded=0;whiteSpace=wrap;html=1;"
+
+# Characters encodeURIComponent leaves alone, as used by draw.io's compressed format
+_URI_SAFE = "-_.!~*'()"
+
+
+def decode_diagram(text: str) -> str:
+    """
+    Decodes a compressed draw.io diagram payload into mxGraphModel XML.
+    """
+    data = zlib.decompress(base64.b64decode(text), -zlib.MAX_WBITS)
+    return urllib.parse.unquote(data.decode("utf-8"))
+
+
+def read_graph_root(file_path: str):
+    """
+    Returns the parsed tree and the <root> element holding the cells of a
+    .drawio file, for plain and compressed diagrams alike.
+    """
+    tree = ET.parse(file_path)
+    diagram = tree.getroot().find("diagram")
+    if diagram is not None and diagram.find("mxGraphModel") is None and (diagram.text or "").strip():
+        model = ET.fromstring(decode_diagram(diagram.text.strip()))
+        diagram.text = None
+        diagram.append(model)
+    return tree, tree.getroot().find(".//root")
+
+
+def _escape_attrib(text: str) -> str:
+    # Same escaping as ElementTree, so streamed and tree-built files match
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    if "\"" in text:
+        text = text.replace("\"", "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
+
+
+def _element(tag: str, attributes: dict, children: str = None) -> str:
+    attrs = "".join(f' {key}="{_escape_attrib(str(value))}"' for key, value in attributes.items())
+    if children is None:
+        return f"<{tag}{attrs} />"
+    return f"<{tag}{attrs}>{children}</{tag}>"
+
+
+class _CompressedSink:
+    """
+    Writes text as draw.io's compressed diagram payload
+    (base64 of raw deflate of the URI-encoded XML) without buffering it.
+    """
+    def __init__(self, output):
+        self.output = output
+        self.compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self.pending = b""
+
+    def write(self, text: str):
+        self._emit(self.compressor.compress(urllib.parse.quote(text, safe=_URI_SAFE).encode("ascii")))
+
+    def close(self):
+        self._emit(self.compressor.flush())
+        self.output.write(base64.b64encode(self.pending).decode("ascii"))
+        self.pending = b""
+
+    def _emit(self, data: bytes):
+        # Base64 works on 3-byte groups; carry the remainder to the next call
+        data = self.pending + data
+        usable = len(data) - len(data) % 3
+        if usable:
+            self.output.write(base64.b64encode(data[:usable]).decode("ascii"))
+        self.pending = data[usable:]
+
+
 class DrawioUmlExporter(UmlExporter):
+    file_extension = ".drawio"
+    required_artifacts = frozenset({ARTIFACT_SVG})
+
+    def __init__(self, compressed: bool = False):
+        # Compressed diagrams match draw.io's native format and are much smaller
+        self.compressed = compressed
 
     def export(self, classes: list[UmlClass], relationships: list[UmlRelationship], output_path: str):
-        def encode_svg(svg_text: str) -> str:
-            try:
-                return base64.b64encode(svg_text.encode("utf-8")).decode("utf-8")
-            except Exception as e:
-                print(f"Error encoding SVG data: {e}")
-                return ""
+        """
+        Streams the diagram to `output_path` cell by cell. Identical SVGs are
+        encoded only once and the encoding is dropped after its last use.
+        """
+        with open(output_path, "w", encoding="utf-8") as output:
+            output.write("<?xml version='1.0' encoding='utf-8'?>\n")
+            output.write(f'<mxfile><diagram name="{_escape_attrib(DIAGRAM_NAME)}">')
 
-        mxfile = ET.Element("mxfile")
-        diagram_node = ET.SubElement(mxfile, "diagram", name="UML Class Diagram")
-        model = ET.SubElement(diagram_node, "mxGraphModel")
-        root = ET.SubElement(model, "root")
+            sink = _CompressedSink(output) if self.compressed else output
+            sink.write("<mxGraphModel><root>")
+            for chunk in self._iter_cells(classes, relationships):
+                sink.write(chunk)
+            sink.write("</root></mxGraphModel>")
+            if self.compressed:
+                sink.close()
 
-        ET.SubElement(root, "mxCell", id="0")
-        ET.SubElement(root, "mxCell", id="1", parent="0")
+            output.write("</diagram></mxfile>")
+
+        print(f"Draw.io diagram exported to {output_path}")
+
+    def _iter_cells(self, classes: list[UmlClass], relationships: list[UmlRelationship]):
+        yield _element("mxCell", {"id": "0"})
+        yield _element("mxCell", {"id": "1", "parent": "0"})
+
+        # Only SVGs used more than once are kept encoded between cells
+        remaining_uses = Counter(uml_class.svg_data for uml_class in classes)
+        shared_images = {}
 
         class_id_map = {}
-        edge_counter = 1
+        for uml_class in classes:
+            svg_text = uml_class.svg_data
+            image_data = shared_images.get(svg_text)
+            if image_data is None:
+                image_data = self._encode_svg(svg_text)
+                if remaining_uses[svg_text] > 1:
+                    shared_images[svg_text] = image_data
+
+            remaining_uses[svg_text] -= 1
+            if remaining_uses[svg_text] == 0:
+                shared_images.pop(svg_text, None)
+
+            if not image_data:
+                continue
+
+            cell_attributes, geometry_attributes = self._class_cell_attributes(uml_class, image_data)
+            yield _element("mxCell", cell_attributes, _element("mxGeometry", geometry_attributes))
+            class_id_map[uml_class.class_id] = uml_class.class_id
+
+        for edge_attributes in self._iter_edge_attributes(relationships, class_id_map):
+            yield _element("mxCell", edge_attributes, _element("mxGeometry", {"relative": "1", "as": "geometry"}))
+
+    def patch(self, classes: list[UmlClass], relationships: list[UmlRelationship], output_path: str,
+              changed_ids: set, moved_ids: set, removed_ids: set, relationships_changed: bool):
+        """
+        Updates a previously exported diagram in place: re-creates the cells
+        of changed classes, moves the geometry of moved ones and drops removed
+        ones. Edges are rebuilt only when relationships or class cells changed.
+        """
+        tree, root = read_graph_root(output_path)
+
+        changed_ids = {str(class_id) for class_id in changed_ids}
+        moved_ids = {str(class_id) for class_id in moved_ids}
+        removed_ids = {str(class_id) for class_id in removed_ids}
+
+        cells = {cell.attrib.get("id"): cell for cell in root.findall("mxCell") if cell.attrib.get("vertex") == "1"}
+        present_ids = set()
 
         for uml_class in classes:
-            x, y = uml_class.position
-            width, height = uml_class.size
-            image_data = encode_svg(uml_class.svg_data)
-            if image_data:
-                img_src = f"data:image/svg+xml;base64,{image_data}"
-                cell = ET.SubElement(root, "mxCell",
-                    id=str(uml_class.class_id),
-                    value=f"<img width='{width}' height='{height}' src='{img_src}'>",
-                    style="rounded=0;whiteSpace=wrap;html=1;",
-                    vertex="1",
-                    parent="1")
-                ET.SubElement(cell, "mxGeometry", x=str(x), y=str(y), width=str(width), height=str(height), **{"as": "geometry"})
-                class_id_map[uml_class.class_id] = uml_class.class_id
+            class_id = str(uml_class.class_id)
+            if class_id in changed_ids:
+                if class_id in cells:
+                    root.remove(cells[class_id])
+                if self._add_class_cell(root, uml_class) is not None:
+                    present_ids.add(class_id)
+            elif class_id in cells:
+                present_ids.add(class_id)
+                if class_id in moved_ids:
+                    geometry = cells[class_id].find("mxGeometry")
+                    x, y = uml_class.position
+                    geometry.set("x", str(x))
+                    geometry.set("y", str(y))
+
+        for class_id in removed_ids:
+            if class_id in cells:
+                root.remove(cells[class_id])
+
+        if relationships_changed or changed_ids or removed_ids:
+            # Edges only reference cells by id, so rebuilding them is cheap
+            for cell in root.findall("mxCell"):
+                if cell.attrib.get("edge") == "1":
+                    root.remove(cell)
+            class_id_map = {
+                uml_class.class_id: uml_class.class_id
+                for uml_class in classes
+                if str(uml_class.class_id) in present_ids
+            }
+            self._add_edges(root, relationships, class_id_map)
+
+        if self.compressed:
+            diagram = tree.getroot().find("diagram")
+            model = diagram.find("mxGraphModel")
+            diagram.remove(model)
+            with open(output_path, "w", encoding="utf-8") as output:
+                output.write("<?xml version='1.0' encoding='utf-8'?>\n")
+                output.write(f'<mxfile><diagram name="{_escape_attrib(diagram.get("name", DIAGRAM_NAME))}">')
+                sink = _CompressedSink(output)
+                sink.write(ET.tostring(model, encoding="unicode"))
+                sink.close()
+                output.write("</diagram></mxfile>")
+        else:
+            tree.write(output_path, encoding="utf-8", xml_declaration=True)
+        print(f"Draw.io diagram patched in {output_path}")
+
+    def _encode_svg(self, svg_text: str) -> str:
+        try:
+            return base64.b64encode(svg_text.encode("utf-8")).decode("utf-8")
+        except Exception as e:
+            print(f"Error encoding SVG data: {e}")
+            return ""
+
+    def _class_cell_attributes(self, uml_class: UmlClass, image_data: str):
+        x, y = uml_class.position
+        width, height = uml_class.size
+        img_src = f"data:image/svg+xml;base64,{image_data}"
+        cell_attributes = {
+            "id": str(uml_class.class_id),
+            "value": f"<img width='{width}' height='{height}' src='{img_src}'>",
+            "style": CLASS_STYLE,
+            "vertex": "1",
+            "parent": "1",
+        }
+        geometry_attributes = {"x": str(x), "y": str(y), "width": str(width), "height": str(height), "as": "geometry"}
+        return cell_attributes, geometry_attributes
+
+    def _add_class_cell(self, root, uml_class: UmlClass):
+        # Access the SVG first: loading it lazily also fills in the size
+        image_data = self._encode_svg(uml_class.svg_data)
+        if not image_data:
+            return None
+
+        cell_attributes, geometry_attributes = self._class_cell_attributes(uml_class, image_data)
+        cell = ET.SubElement(root, "mxCell", cell_attributes)
+        ET.SubElement(cell, "mxGeometry", geometry_attributes)
+        return cell
+
+    def _add_edges(self, root, relationships: list[UmlRelationship], class_id_map: dict):
+        for edge_attributes in self._iter_edge_attributes(relationships, class_id_map):
+            edge = ET.SubElement(root, "mxCell", edge_attributes)
+            ET.SubElement(edge, "mxGeometry", relative="1", **{"as": "geometry"})
+
+    def _iter_edge_attributes(self, relationships: list[UmlRelationship], class_id_map: dict):
+        edge_counter = 1
 
         for rel in relationships:
             src = class_id_map.get(rel.source)
@@ -60,17 +271,13 @@ class DrawioUmlExporter(UmlExporter):
             elif rel.type == "composition":
                 style += "endArrow=diamond;fillColor=black;"
 
-            edge = ET.SubElement(root, "mxCell",
-                id=f"edge_{edge_counter}",
-                value=rel.label or "",
-                style=style,
-                edge="1",
-                parent="1",
-                source=str(src),
-                target=str(dst))
-            ET.SubElement(edge, "mxGeometry", relative="1", **{"as": "geometry"})
+            yield {
+                "id": f"edge_{edge_counter}",
+                "value": rel.label or "",
+                "style": style,
+                "edge": "1",
+                "parent": "1",
+                "source": str(src),
+                "target": str(dst),
+            }
             edge_counter += 1
-
-        tree = ET.ElementTree(mxfile)
-        tree.write(output_path, encoding="utf-8", xml_declaration=True)
-        print(f"Draw.io diagram exported to {output_path}")
\ No newline at end of file
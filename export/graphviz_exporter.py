@@ -1,29 +1,63 @@
 # graphviz_exporter.py
-import os
-import tempfile
-import atexit
+import math
 import graphviz
 from application.interface import UmlExporter
-from core.uml_class import UmlClass
+from application.profiler import get_profiler
+from core.uml_class import UmlClass, ARTIFACT_CODE, ARTIFACT_SIZE
 from core.uml_relationshpi import UmlRelationship
 
-class GraphvizUmlExporter(UmlExporter):
-    def __init__(self):
-        # Create a dedicated temp directory for image files
-        self.temp_dir = os.path.join(tempfile.gettempdir(), "graphviz_uml_temp")
-        os.makedirs(self.temp_dir, exist_ok=True)
+# Native layout geometry, in points (draw.io units are used 1:1)
+CLUSTER_MARGIN = 12.0
+CLUSTER_LABEL_HEIGHT = 18.0
+ARROW_LENGTH = 10.0
+
+
+def build_class_group_tree(classes: list[UmlClass]) -> dict:
+    """
+    Organizes classes into nested dicts by group path; the classes of a
+    group are stored under the "_classes" key.
+    """
+    class_group_tree = {}
+
+    for uml_class in classes:
+        node = class_group_tree
+        for group in uml_class.groups:
+            node = node.setdefault(group, {})
+        node.setdefault("_classes", []).append(uml_class)
 
-        self._temp_files = []
-        atexit.register(self._cleanup_temp_files)
+    return class_group_tree
 
-    def _cleanup_temp_files(self):
-        for file_path in self._temp_files:
-            try:
-                os.unlink(file_path)
-            except OSError:
-                pass
+
+def edge_style(relationship_type: str):
+    style, arrowhead = "solid", "none"
+    if relationship_type == "inheritance":
+        arrowhead = "empty"
+    elif relationship_type == "association":
+        arrowhead = "open"
+    elif relationship_type == "dependency":
+        style = "dashed"; arrowhead = "open"
+    elif relationship_type == "aggregation":
+        arrowhead = "diamond"
+    elif relationship_type == "composition":
+        arrowhead = "diamond"; style = "bold"
+    return style, arrowhead
+
+
+class GraphvizUmlExporter(UmlExporter):
+    file_extension = ".gv"
+    # The record label and the class size used for padding and native boxes; no image render
+    required_artifacts = frozenset({ARTIFACT_CODE, ARTIFACT_SIZE})
+
+    def __init__(self, native_layout: bool = False):
+        # Native layout computes cluster boxes and edge routes from the stored
+        # positions and renders with `neato -n2` instead of running the solver
+        self.native_layout = native_layout
 
     def export(self, classes: list[UmlClass], relationships: list[UmlRelationship], output_path: str):
+        if self.native_layout:
+            self.export_native(classes, relationships, output_path)
+            return
+
         dot = graphviz.Digraph("UML_Class_Diagram", format="png")
         dot.attr(layout="neato", splines="curved", inputscale="1")
 
@@ -32,13 +66,7 @@ class GraphvizUmlExporter(UmlExporter):
         dot.attr("node")
 
         # Step 1: Organize classes into a tree based on group path
-        class_group_tree = {}
-
-        for uml_class in classes:
-            node = class_group_tree
-            for group in uml_class.groups:
-                node = node.setdefault(group, {})
-            node.setdefault("_classes", []).append(uml_class)
+        class_group_tree = build_class_group_tree(classes)
 
         # Step 2: Recursive function to add clusters and class nodes
         def add_clusters(parent_graph, group_dict, prefix=""):
@@ -83,19 +111,12 @@ class GraphvizUmlExporter(UmlExporter):
         # Step 3: Build nested clusters
         add_clusters(dot, class_group_tree)
 
-        # Step 4: Draw relationships
+        # Step 4: Draw relationships; Graphviz would add unknown endpoints as bare nodes
+        class_ids = {str(uml_class.class_id) for uml_class in classes}
         for rel in relationships:
-            style, arrowhead = "solid", "none"
-            if rel.type == "inheritance":
-                arrowhead = "empty"
-            elif rel.type == "association":
-                arrowhead = "open"
-            elif rel.type == "dependency":
-                style = "dashed"; arrowhead = "open"
-            elif rel.type == "aggregation":
-                arrowhead = "diamond"
-            elif rel.type == "composition":
-                arrowhead = "diamond"; style = "bold"
+            if str(rel.source) not in class_ids or str(rel.destination) not in class_ids:
+                continue
+            style, arrowhead = edge_style(rel.type)
 
             dot.edge(
                 str(rel.source),
@@ -106,5 +127,148 @@ class GraphvizUmlExporter(UmlExporter):
                 constraint="false"
             )
 
-        dot.render(output_path, format="svg")
+        with get_profiler().subprocess("neato", output=output_path):
+            dot.render(output_path, format="svg")
+        print(f"Graphviz UML diagram exported to {output_path}.svg")
+
+
+    def export_native(self, classes: list[UmlClass], relationships: list[UmlRelationship], output_path: str):
+        """
+        Renders the diagram exactly as placed: every node, cluster box and
+        edge route is computed here, so `neato -n2` only draws.
+        """
+        dot = graphviz.Digraph("UML_Class_Diagram", format="svg", engine="neato")
+        dot.attr(splines="line", outputorder="edgesfirst")
+
+        boxes = {}
+        for uml_class in classes:
+            boxes[str(uml_class.class_id)] = self._class_box(uml_class)
+
+        # Step 1: Nested clusters with precomputed bounding boxes
+        class_group_tree = build_class_group_tree(classes)
+
+        def add_clusters(parent_graph, group_dict, prefix=""):
+            """Adds the group's nodes and clusters and returns its bounding box."""
+            bounds = []
+            for group_name, subgroups in group_dict.items():
+                if group_name == "_classes":
+                    for uml_class in subgroups:
+                        box = boxes[str(uml_class.class_id)]
+                        bounds.append(box)
+                        left, bottom, right, top = box
+                        parent_graph.node(
+                            str(uml_class.class_id),
+                            label=uml_class.code_data,
+                            shape="record",
+                            pos=f"{(left + right) / 2:.2f},{(bottom + top) / 2:.2f}",
+                            width=f"{(right - left) / 72:.4f}",
+                            height=f"{(top - bottom) / 72:.4f}",
+                            fixedsize="true",
+                            style="filled",
+                            fillcolor="lightgray",
+                        )
+                else:
+                    cluster_name = f"cluster_{prefix}{group_name}"
+                    with parent_graph.subgraph(name=cluster_name) as sub:
+                        inner = add_clusters(sub, subgroups, prefix=f"{prefix}{group_name}_")
+                        if inner is None:
+                            continue
+                        left, bottom, right, top = inner
+                        cluster_box = (
+                            left - CLUSTER_MARGIN,
+                            bottom - CLUSTER_MARGIN,
+                            right + CLUSTER_MARGIN,
+                            top + CLUSTER_MARGIN + CLUSTER_LABEL_HEIGHT,
+                        )
+                        bounds.append(cluster_box)
+                        sub.attr(
+                            label=group_name, style="rounded", color="black",
+                            bb=",".join(f"{value:.2f}" for value in cluster_box),
+                            lp=f"{(cluster_box[0] + cluster_box[2]) / 2:.2f},{cluster_box[3] - CLUSTER_LABEL_HEIGHT / 2:.2f}",
+                        )
+
+            if not bounds:
+                return None
+            return (
+                min(box[0] for box in bounds),
+                min(box[1] for box in bounds),
+                max(box[2] for box in bounds),
+                max(box[3] for box in bounds),
+            )
+
+        graph_box = add_clusters(dot, class_group_tree)
+        if graph_box is not None:
+            dot.attr(bb=",".join(f"{value:.2f}" for value in graph_box))
+
+        # Step 2: Straight edge routes between the node borders
+        for rel in relationships:
+            source_box = boxes.get(str(rel.source))
+            target_box = boxes.get(str(rel.destination))
+            if source_box is None or target_box is None:
+                continue
+
+            style, arrowhead = edge_style(rel.type)
+            pos, label_pos = self._edge_route(source_box, target_box, arrowhead != "none")
+            attributes = {"style": style, "arrowhead": arrowhead, "pos": pos}
+            if rel.label:
+                attributes["label"] = rel.label
+                attributes["lp"] = label_pos
+
+            dot.edge(str(rel.source), str(rel.destination), **attributes)
+
+        with get_profiler().subprocess("neato -n2", output=output_path):
+            dot.render(output_path, format="svg", neato_no_op=2)
         print(f"Graphviz UML diagram exported to {output_path}.svg")
+
+    def _class_box(self, uml_class: UmlClass):
+        """
+        (left, bottom, right, top) in Graphviz coordinates, where y grows upwards.
+        """
+        x, y = uml_class.position
+        width, height = uml_class.size
+        return (x, -(y + height), x + width, -y)
+
+    def _edge_route(self, source_box, target_box, has_arrow: bool):
+        sx, sy = (source_box[0] + source_box[2]) / 2, (source_box[1] + source_box[3]) / 2
+        tx, ty = (target_box[0] + target_box[2]) / 2, (target_box[1] + target_box[3]) / 2
+
+        start = self._clip_to_box(source_box, (sx, sy), (tx, ty))
+        end = self._clip_to_box(target_box, (tx, ty), (sx, sy))
+
+        # The spline stops short of the arrow tip, which Graphviz draws to `end`
+        spline_end = end
+        if has_arrow:
+            dx, dy = end[0] - start[0], end[1] - start[1]
+            length = math.hypot(dx, dy)
+            if length > ARROW_LENGTH:
+                spline_end = (end[0] - dx / length * ARROW_LENGTH, end[1] - dy / length * ARROW_LENGTH)
+
+        # A straight line as a single cubic Bezier segment
+        points = [
+            start,
+            (start[0] + (spline_end[0] - start[0]) / 3, start[1] + (spline_end[1] - start[1]) / 3),
+            (start[0] + 2 * (spline_end[0] - start[0]) / 3, start[1] + 2 * (spline_end[1] - start[1]) / 3),
+            spline_end,
+        ]
+        pos = " ".join(f"{px:.2f},{py:.2f}" for px, py in points)
+        if has_arrow:
+            pos = f"e,{end[0]:.2f},{end[1]:.2f} " + pos
+
+        label_pos = f"{(start[0] + end[0]) / 2:.2f},{(start[1] + end[1]) / 2:.2f}"
+        return pos, label_pos
+
+    def _clip_to_box(self, box, inside, outside):
+        """
+        Point where the segment from the box centre towards `outside` leaves the box.
+        """
+        left, bottom, right, top = box
+        dx, dy = outside[0] - inside[0], outside[1] - inside[1]
+        scales = []
+        if dx:
+            scales.append(((right if dx > 0 else left) - inside[0]) / dx)
+        if dy:
+            scales.append(((top if dy > 0 else bottom) - inside[1]) / dy)
+        if not scales:
+            return inside
+        scale = min(1.0, min(scales))
+        return (inside[0] + dx * scale, inside[1] + dy * scale)
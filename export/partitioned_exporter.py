@@ -0,0 +1,271 @@
+# partitioned_exporter.py
+import os
+import re
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from application.interface import UmlExporter
+from core.uml_class import UmlClass, ARTIFACT_SVG, ARTIFACT_PNG, ARTIFACT_CODE
+from core.uml_relationshpi import UmlRelationship
+
+PARTITION_BY_GROUP = "group"
+PARTITION_BY_TILE = "tile"
+INDEX_FILE = "index.json"
+_ARTIFACT_ATTRIBUTES = {ARTIFACT_SVG: "svg_data", ARTIFACT_PNG: "png_data", ARTIFACT_CODE: "code_data"}
+
+
+class _PartitionPlan:
+    def __init__(self):
+        self.partitions: Dict[str, List[UmlClass]] = {}
+        self.file_names: Dict[str, str] = {}
+        self.internal: Dict[str, List[UmlRelationship]] = {}
+        # partition -> {class_id: stub}
+        self.stubs: Dict[str, Dict[str, UmlClass]] = {}
+        self.cross_links = []
+
+    def members(self, key: str) -> List[UmlClass]:
+        return self.partitions[key] + list(self.stubs[key].values())
+
+
+class PartitionedUmlExporter(UmlExporter):
+    """
+    Splits the diagram into one file per group or per spatial tile and
+    exports the partitions in parallel with the wrapped exporter.
+
+    `output_path` is used as a directory. Classes that are related to a
+    class of the partition but live elsewhere are added as stubs, grouped
+    under the name of their home partition, and every crossing relationship
+    is listed in index.json.
+    """
+
+    def __init__(self, exporter: UmlExporter, mode: str = PARTITION_BY_GROUP, group_depth: int = 1,
+                 tile_size: float = 4000.0, workers: int = None):
+        if mode not in (PARTITION_BY_GROUP, PARTITION_BY_TILE):
+            raise ValueError(f"Unknown partition mode: {mode}")
+        self.exporter = exporter
+        self.mode = mode
+        self.group_depth = group_depth
+        self.tile_size = tile_size
+        self.workers = workers
+
+    @property
+    def file_extension(self) -> str:
+        return f".{self.mode}s"
+
+    @property
+    def required_artifacts(self) -> frozenset:
+        return self.exporter.required_artifacts
+
+    def partition_key(self, uml_class: UmlClass) -> str:
+        if self.mode == PARTITION_BY_GROUP:
+            groups = uml_class.groups[:self.group_depth]
+            return "/".join(groups) if groups else "_ungrouped"
+        x, y = uml_class.position
+        return f"tile_{math.floor(x / self.tile_size)}_{math.floor(y / self.tile_size)}"
+
+    def export(self, classes: List[UmlClass], relationships: List[UmlRelationship], output_path: str):
+        os.makedirs(output_path, exist_ok=True)
+        plan = self._plan(classes, relationships)
+
+        # Export all partitions in parallel
+        def export_partition(key):
+            self.exporter.export(plan.members(key), plan.internal[key], os.path.join(output_path, plan.file_names[key]))
+
+        self._run(export_partition, list(plan.partitions))
+        self._write_index(plan, output_path)
+        print(f"Partitioned export: {len(plan.partitions)} partitions written to {output_path}")
+
+    def patch(self, classes: List[UmlClass], relationships: List[UmlRelationship], output_path: str,
+              changed_ids: set, moved_ids: set, removed_ids: set, relationships_changed: bool):
+        """
+        Rewrites only the partitions that contain a changed, moved or removed
+        class or whose members changed; the others are left untouched, so
+        their unchanged classes are not rendered. Partition files are patched
+        when the wrapped exporter supports it. Falls back to export when the
+        previous index is missing or was written with other settings.
+        """
+        previous = self._read_index(output_path)
+        if previous is None:
+            self.export(classes, relationships, output_path)
+            return
+
+        changed_ids = {str(class_id) for class_id in changed_ids}
+        moved_ids = {str(class_id) for class_id in moved_ids}
+        removed_ids = {str(class_id) for class_id in removed_ids}
+        plan = self._plan(classes, relationships)
+        old_partitions = {entry["name"]: entry for entry in previous["partitions"]}
+
+        # Step 1: Work out what changed per partition
+        updates = {}
+        for key in plan.partitions:
+            old = old_partitions.get(key)
+            if old is None or old["file"] != plan.file_names[key] \
+                    or not os.path.exists(os.path.join(output_path, old["file"])):
+                updates[key] = None
+                continue
+
+            old_stubs = old["stub_homes"]
+            old_members = set(old["class_ids"]) | set(old_stubs)
+            new_stubs = {class_id: self._stub_home(stub) for class_id, stub in plan.stubs[key].items()}
+            new_members = {str(uml_class.class_id) for uml_class in plan.partitions[key]} | set(new_stubs)
+
+            partition_changed = (changed_ids & new_members) | (new_members - old_members)
+            partition_changed |= {class_id for class_id, home in new_stubs.items()
+                                  if class_id in old_stubs and old_stubs[class_id] != home}
+            partition_moved = moved_ids & new_members
+            partition_removed = (old_members - new_members) | (removed_ids & old_members)
+            if partition_changed or partition_moved or partition_removed or relationships_changed:
+                updates[key] = (partition_changed, partition_moved, partition_removed)
+
+        # Step 2: Rewrite the affected partitions in parallel
+        def update_partition(key):
+            partition_path = os.path.join(output_path, plan.file_names[key])
+            if updates[key] is None or not hasattr(self.exporter, "patch"):
+                self.exporter.export(plan.members(key), plan.internal[key], partition_path)
+            else:
+                self.exporter.patch(plan.members(key), plan.internal[key], partition_path,
+                                    *updates[key], relationships_changed)
+
+        self._run(update_partition, list(updates))
+
+        # Step 3: Drop the files of partitions that no longer exist
+        current_files = set(plan.file_names.values())
+        for entry in previous["partitions"]:
+            old_path = os.path.join(output_path, entry["file"])
+            if entry["file"] not in current_files and os.path.exists(old_path):
+                os.remove(old_path)
+
+        self._write_index(plan, output_path)
+        print(f"Partitioned export: {len(updates)} of {len(plan.partitions)} partitions updated in {output_path}")
+
+    # -------------------------------------------------------------
+
+    def _plan(self, classes: List[UmlClass], relationships: List[UmlRelationship]) -> "_PartitionPlan":
+        plan = _PartitionPlan()
+
+        # Step 1: Assign classes to partitions, keeping the model order
+        home: Dict[str, str] = {}
+        for uml_class in classes:
+            key = self.partition_key(uml_class)
+            plan.partitions.setdefault(key, []).append(uml_class)
+            home[str(uml_class.class_id)] = key
+
+        plan.file_names = self._file_names(plan.partitions)
+
+        # Step 2: Relationships inside a partition, and stubs for the crossing ones
+        plan.internal = {key: [] for key in plan.partitions}
+        plan.stubs = {key: {} for key in plan.partitions}
+        class_by_id = {str(uml_class.class_id): uml_class for uml_class in classes}
+
+        for rel in relationships:
+            source_key = home.get(str(rel.source))
+            destination_key = home.get(str(rel.destination))
+            if source_key is None or destination_key is None:
+                continue
+
+            if source_key == destination_key:
+                plan.internal[source_key].append(rel)
+                continue
+
+            for key, foreign_id, foreign_key in ((source_key, str(rel.destination), destination_key),
+                                                 (destination_key, str(rel.source), source_key)):
+                if foreign_id not in plan.stubs[key]:
+                    plan.stubs[key][foreign_id] = self._make_stub(class_by_id[foreign_id], foreign_key)
+                plan.internal[key].append(rel)
+
+            plan.cross_links.append({
+                "source": rel.source,
+                "destination": rel.destination,
+                "type": rel.type,
+                "label": rel.label,
+                "source_partition": plan.file_names[source_key],
+                "destination_partition": plan.file_names[destination_key],
+            })
+        return plan
+
+    def _run(self, action, keys: list):
+        if not keys:
+            return
+        with ThreadPoolExecutor(max_workers=self.workers or min(32, len(keys))) as executor:
+            for future in [executor.submit(action, key) for key in keys]:
+                future.result()
+
+    def _settings(self) -> dict:
+        return {"mode": self.mode, "group_depth": self.group_depth, "tile_size": self.tile_size,
+                "file_extension": self.exporter.file_extension}
+
+    def _write_index(self, plan: "_PartitionPlan", output_path: str):
+        """
+        Index of the partitions and the links between them. The member ids
+        let patch find the partitions affected by a change.
+        """
+        index = {
+            **self._settings(),
+            "partitions": [
+                {
+                    "name": key,
+                    "file": plan.file_names[key],
+                    "classes": len(plan.partitions[key]),
+                    "stubs": len(plan.stubs[key]),
+                    "relationships": len(plan.internal[key]),
+                    "bounds": self._bounds(plan.partitions[key]),
+                    "class_ids": [str(uml_class.class_id) for uml_class in plan.partitions[key]],
+                    "stub_homes": {class_id: self._stub_home(stub) for class_id, stub in plan.stubs[key].items()},
+                }
+                for key in plan.partitions
+            ],
+            "cross_links": plan.cross_links,
+        }
+        with open(os.path.join(output_path, INDEX_FILE), 'w') as f:
+            json.dump(index, f, indent=2)
+
+    def _read_index(self, output_path: str):
+        index_path = os.path.join(output_path, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return None
+        try:
+            with open(index_path, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if any(index.get(name) != value for name, value in self._settings().items()):
+            return None
+        if any("class_ids" not in entry or "stub_homes" not in entry for entry in index.get("partitions", [])):
+            return None
+        return index
+
+    def _stub_home(self, stub: UmlClass) -> str:
+        return stub.groups[0]
+
+    def _file_names(self, partitions: Dict[str, List[UmlClass]]) -> Dict[str, str]:
+        file_names = {}
+        used = set()
+        for key in partitions:
+            base = re.sub(r'[^A-Za-z0-9_.-]+', '_', key).strip('_') or "partition"
+            name = base
+            suffix = 2
+            while name in used:
+                name = f"{base}_{suffix}"
+                suffix += 1
+            used.add(name)
+            file_names[key] = name + self.exporter.file_extension
+        return file_names
+
+    def _make_stub(self, uml_class: UmlClass, home_key: str) -> UmlClass:
+        # Same id and geometry as the original, shown inside a group named after its partition.
+        # Artifacts are taken from the original on access, so only the ones the exporter uses are rendered.
+        stub = UmlClass(uml_class.class_id, uml_class.name, [], uml_class.is_abstract, (f"[{home_key}]",),
+                        uml_class.position, uml_class.size, None, None, None)
+        stub.label = uml_class.label
+        stub.artifact_loader = lambda _, artifact: getattr(uml_class, _ARTIFACT_ATTRIBUTES[artifact])
+        return stub
+
+    def _bounds(self, classes: List[UmlClass]) -> Tuple[float, float, float, float]:
+        return (
+            min(uml_class.position[0] for uml_class in classes),
+            min(uml_class.position[1] for uml_class in classes),
+            max(uml_class.position[0] + uml_class.size[0] for uml_class in classes),
+            max(uml_class.position[1] + uml_class.size[1] for uml_class in classes),
+        )
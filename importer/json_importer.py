@@ -3,7 +3,10 @@ import json
 from typing import List
 
 from core.uml_class import UmlClass
+from core.uml_class_index import UmlClassIndex
+from core.uml_geometry import GeometryStore, GroupPathTable
 from core.uml_relationshpi import UmlRelationship
+from core.relationship_index import RelationshipIndex
 from application.interface import UmlImporter
 
 
@@ -11,6 +14,13 @@ class JsonUmlImporter(UmlImporter):
     def __init__(self):
         self.uml_classes: List[UmlClass] = []
         self.relationships: List[UmlRelationship] = []
+        self.class_index = UmlClassIndex()
+        self.relationship_index = RelationshipIndex()
+        # Positions/sizes of all imported classes and their shared group paths
+        self.geometry = GeometryStore()
+        self.group_paths = GroupPathTable()
+        # Ids of the classes that got a position from the positions file
+        self.pinned_ids = set()
 
     def import_classes_and_relationships(self, input_path:str):
         with open(input_path, 'r') as json_input:
@@ -62,15 +72,18 @@ class JsonUmlImporter(UmlImporter):
 
                     position = (0.0, 0.0)
                     size = (0.0, 0.0)
-                    svg_data = []
-                    png_data = []
-                    code_data = []
+                    # Rendered later, on demand
+                    svg_data = None
+                    png_data = None
+                    code_data = None
 
-                    # Join the group path for display or keep it as list depending on UmlClass constructor
-                    groups = current_group_path
+                    # Siblings share one interned tuple for their group path
+                    groups = self.group_paths.intern(current_group_path)
 
-                    uml_class = UmlClass(class_id, name, methods, is_abstract, groups, position, size, svg_data, png_data, code_data)
+                    uml_class = UmlClass(class_id, name, methods, is_abstract, groups, position, size, svg_data, png_data, code_data,
+                                         geometry=self.geometry)
                     self.uml_classes.append(uml_class)
+                    self.class_index.add(uml_class)
 
                 if "elements" in class_data_item:
                     process_elements(class_data_item["elements"], current_group_path)
@@ -87,6 +100,7 @@ class JsonUmlImporter(UmlImporter):
             
             uml_relationship = UmlRelationship(source_id, destination_id, relationship_type, access, label)
             self.relationships.append(uml_relationship)
+            self.relationship_index.add(uml_relationship)
 
 
 
@@ -101,10 +115,11 @@ class JsonUmlImporter(UmlImporter):
             )
 
             # Find the UmlClass with the matching class_id
-            uml_class = next((uc for uc in self.uml_classes if uc.class_id == class_id), None)
+            uml_class = self.class_index.get(class_id)
 
             if uml_class:
                 uml_class.position = position
+                self.pinned_ids.add(str(class_id))
             else:
                 print(f"Warning: UmlClass with ID {class_id} not found.")
     
\ No newline at end of file
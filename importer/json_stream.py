@@ -0,0 +1,182 @@
+# json_stream.py
+import re
+import json
+from json.decoder import scanstring
+from typing import IO, Iterator, Tuple
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+_NUMBER_RE = re.compile(r'-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?')
+_LITERALS = {"true": ("boolean", True), "false": ("boolean", False), "null": ("null", None)}
+
+
+def iter_json_file(input_path: str, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, object]]:
+    """
+    Yields the parse events of a JSON file, using ijson when it is installed
+    and the pure Python tokenizer below otherwise.
+    """
+    if ijson is not None:
+        with open(input_path, 'rb') as json_input:
+            yield from ijson.basic_parse(json_input, use_float=True)
+    else:
+        with open(input_path, 'r', encoding='utf-8') as json_input:
+            yield from iter_json_events(json_input, chunk_size)
+
+
+def iter_json_events(json_file: IO[str], chunk_size: int = 1 << 16) -> Iterator[Tuple[str, object]]:
+    """
+    Yields ijson-style basic parse events (start_map, map_key, end_map,
+    start_array, end_array, string, number, boolean, null) for a JSON text
+    file, reading it in chunks instead of loading it into memory.
+    """
+    buffer = ""
+    pos = 0
+    eof = False
+    containers = []   # "map" / "array"
+    expect_key = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = json_file.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    while True:
+        pos = _WHITESPACE_RE.match(buffer, pos).end()
+        if pos >= len(buffer):
+            if eof:
+                break
+            fill()
+            continue
+
+        char = buffer[pos]
+        if char == '{':
+            pos += 1
+            containers.append("map")
+            expect_key = True
+            yield "start_map", None
+        elif char == '}':
+            pos += 1
+            containers.pop()
+            expect_key = False
+            yield "end_map", None
+        elif char == '[':
+            pos += 1
+            containers.append("array")
+            yield "start_array", None
+        elif char == ']':
+            pos += 1
+            containers.pop()
+            yield "end_array", None
+        elif char == ',':
+            pos += 1
+            expect_key = bool(containers) and containers[-1] == "map"
+        elif char == ':':
+            pos += 1
+        elif char == '"':
+            try:
+                value, end = scanstring(buffer, pos + 1)
+            except json.JSONDecodeError:
+                # The string continues in the next chunk
+                if eof:
+                    raise
+                fill()
+                continue
+            pos = end
+            if expect_key:
+                expect_key = False
+                yield "map_key", value
+            else:
+                yield "string", value
+        else:
+            match = _NUMBER_RE.match(buffer, pos)
+            token_end = match.end() if match and match.end() > pos else pos
+            if len(buffer) - token_end <= 2 and not eof:
+                # A number or literal may be cut at the chunk boundary (e.g. "1.", "2e-")
+                fill()
+                continue
+
+            if token_end > pos:
+                text = match.group(0)
+                pos = token_end
+                is_float = match.group(1) or match.group(2)
+                yield "number", float(text) if is_float else int(text)
+                continue
+
+            for literal, event in _LITERALS.items():
+                if buffer.startswith(literal, pos):
+                    pos += len(literal)
+                    yield event
+                    break
+            else:
+                if len(buffer) - pos < 5 and not eof:
+                    fill()
+                    continue
+                raise ValueError(f"Unexpected character {char!r} in JSON stream")
+
+
+def build_value(events: Iterator[Tuple[str, object]], event: str, value):
+    """
+    Builds one complete JSON value starting at (event, value), consuming
+    the remaining events of that value. Works iteratively, so deeply
+    nested values do not hit the recursion limit.
+    """
+    if event not in ("start_map", "start_array"):
+        return value
+
+    root = {} if event == "start_map" else []
+    stack = [root]
+    key = None
+
+    for event, value in events:
+        current = stack[-1]
+        if event == "map_key":
+            key = value
+            continue
+
+        if event in ("end_map", "end_array"):
+            stack.pop()
+            if not stack:
+                return root
+            continue
+
+        if event == "start_map":
+            item = {}
+        elif event == "start_array":
+            item = []
+        else:
+            item = value
+
+        if isinstance(current, dict):
+            current[key] = item
+        else:
+            current.append(item)
+
+        if event in ("start_map", "start_array"):
+            stack.append(item)
+
+    raise ValueError("Unexpected end of JSON stream")
+
+
+def skip_value(events: Iterator[Tuple[str, object]], event: str):
+    """
+    Consumes the remaining events of a value without building it.
+    """
+    if event not in ("start_map", "start_array"):
+        return
+
+    depth = 1
+    for event, _ in events:
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+            if depth == 0:
+                return
+    raise ValueError("Unexpected end of JSON stream")
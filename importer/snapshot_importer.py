@@ -0,0 +1,273 @@
+# snapshot_importer.py
+import os
+import json
+import mmap
+import struct
+import tempfile
+from typing import List
+
+from core.uml_class import UmlClass, ARTIFACT_SVG, ARTIFACT_PNG, ARTIFACT_CODE
+from core.uml_relationshpi import UmlRelationship
+from importer.json_importer import JsonUmlImporter
+from class_generators.graphviz_class_generator import png_size
+
+# Snapshot layout (little endian):
+#   header        magic, version, class/relationship counts, heap offset, source/value table/heap sizes
+#   class table   one _CLASS record per class
+#   relations     one _RELATIONSHIP record per relationship
+#   heap          the source fingerprint (JSON), the value table, then the deduplicated SVG/PNG/code blobs
+#
+# Ids, names, methods, group paths and labels live in the value table, a
+# JSON array that loads in one call; records hold indices into it. Blobs
+# are (offset, length) refs behind the value table and only read when accessed.
+SNAPSHOT_MAGIC = b"UMLSNAP\0"
+SNAPSHOT_VERSION = 2
+
+_HEADER = struct.Struct("<8sHxxIIQQQQ")
+# id, name, methods, groups, label values; flags; x, y, width, height; svg, png, code blobs
+_CLASS = struct.Struct("<5IB3x4d" + "QI" * 3)
+# source, destination, type, access, label values
+_RELATIONSHIP = struct.Struct("<5I")
+_NO_BLOB = 0xFFFFFFFF
+_FLAG_ABSTRACT = 1
+_FLAG_PINNED = 2
+_BLOB_ARTIFACTS = (ARTIFACT_SVG, ARTIFACT_PNG, ARTIFACT_CODE)
+
+
+def source_fingerprint(source_path: str) -> dict:
+    """
+    Identifies the model file a snapshot was built from, to detect stale snapshots.
+    """
+    stat = os.stat(source_path)
+    return {"path": os.path.abspath(source_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def read_snapshot_source(file_path: str):
+    """
+    The source fingerprint stored in a snapshot, None if it has none.
+    Reads only the header and the fingerprint, not the model.
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(_HEADER.size)
+        _, _, heap_offset, source_size, _ = _check_header(header, file_path, os.fstat(f.fileno()).st_size)
+        f.seek(heap_offset)
+        return json.loads(f.read(source_size))
+
+
+def _check_header(header: bytes, file_path: str, file_size: int) -> tuple:
+    """
+    Validates a snapshot header and returns the class and relationship
+    counts, heap offset, source and value table sizes.
+    """
+    if len(header) < _HEADER.size:
+        raise ValueError(f"{file_path} is not a UML snapshot")
+    magic, version, class_count, relationship_count, heap_offset, source_size, values_size, heap_size = \
+        _HEADER.unpack(header)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"{file_path} is not a UML snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"{file_path}: unsupported snapshot version {version}")
+    if heap_offset + heap_size > file_size:
+        raise ValueError(f"{file_path}: snapshot is truncated")
+    return class_count, relationship_count, heap_offset, source_size, values_size
+
+
+def _blob_data(uml_class: UmlClass, artifact: str):
+    data = getattr(uml_class, f"{artifact}_data")
+    # Rendered PNGs are generate_png results; only the image is stored, see SnapshotImporter._load_artifact
+    if artifact == ARTIFACT_PNG and isinstance(data, dict):
+        return data["png"]
+    return data
+
+
+class _SnapshotWriter:
+    def __init__(self):
+        self.values = []
+        self._value_indices = {}
+        self.blobs = []
+        self.blob_size = 0
+        self._blob_offsets = {}
+
+    def value(self, value, shared: bool = True) -> int:
+        """
+        Index of `value` in the value table. Shared values are stored once.
+        """
+        if not shared:
+            self.values.append(value)
+            return len(self.values) - 1
+        key = json.dumps(value)
+        index = self._value_indices.get(key)
+        if index is None:
+            index = self._value_indices[key] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def blob(self, data) -> tuple:
+        """
+        (offset, length) ref of `data` in the blob heap, str is stored as UTF-8.
+        """
+        if data is None:
+            return (0, _NO_BLOB)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        offset = self._blob_offsets.get(data)
+        if offset is None:
+            offset = self._blob_offsets[data] = self.blob_size
+            self.blobs.append(data)
+            self.blob_size += len(data)
+        return (offset, len(data))
+
+
+def write_snapshot(file_path: str, classes: List[UmlClass], relationships: List[UmlRelationship],
+                   artifacts=(ARTIFACT_SVG, ARTIFACT_CODE), pinned_ids=(), source_path: str = None):
+    """
+    Writes the model, its geometry and the given rendered artifacts to a
+    binary snapshot. Artifacts that are not rendered yet are rendered through
+    the classes' artifact loader. `pinned_ids` are the classes with a stored
+    position, see JsonUmlImporter.pinned_ids. The fingerprint of
+    `source_path` is stored so stale snapshots can be detected.
+    """
+    writer = _SnapshotWriter()
+    pinned_ids = {str(class_id) for class_id in pinned_ids}
+
+    # Step 1: Class table
+    class_records = []
+    for uml_class in classes:
+        flags = ((_FLAG_ABSTRACT if uml_class.is_abstract else 0)
+                 | (_FLAG_PINNED if str(uml_class.class_id) in pinned_ids else 0))
+        x, y = uml_class.position
+        width, height = uml_class.size
+        blobs = [writer.blob(_blob_data(uml_class, artifact) if artifact in artifacts else None)
+                 for artifact in _BLOB_ARTIFACTS]
+        # Method lists are not shared, as classes may edit their own
+        class_records.append(_CLASS.pack(
+            writer.value(uml_class.class_id), writer.value(uml_class.name),
+            writer.value(uml_class.methods, shared=False), writer.value(list(uml_class.groups)),
+            writer.value(uml_class.label), flags, x, y, width or 0.0, height or 0.0,
+            *(value for ref in blobs for value in ref)))
+
+    # Step 2: Relationship table
+    relationship_records = [
+        _RELATIONSHIP.pack(writer.value(rel.source), writer.value(rel.destination), writer.value(rel.type),
+                           writer.value(rel.access), writer.value(rel.label))
+        for rel in relationships
+    ]
+
+    # Step 3: Header; the heap starts with the source fingerprint and the value table
+    source = json.dumps(source_fingerprint(source_path) if source_path else None).encode("utf-8")
+    value_table = json.dumps(writer.values, separators=(",", ":")).encode("utf-8")
+    heap_offset = _HEADER.size + _CLASS.size * len(class_records) + _RELATIONSHIP.size * len(relationship_records)
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(class_records), len(relationship_records),
+                          heap_offset, len(source), len(value_table),
+                          len(source) + len(value_table) + writer.blob_size)
+
+    # Write next to the target and swap in, so readers never see a partial file
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.writelines(class_records)
+            f.writelines(relationship_records)
+            f.write(source)
+            f.write(value_table)
+            f.writelines(writer.blobs)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class SnapshotImporter(JsonUmlImporter):
+    """
+    Loads a model written by write_snapshot through mmap. Classes,
+    relationships and geometry are created on import; SVG, PNG and code
+    blobs stay in the mapped file until an exporter reads them. Blobs that
+    are missing from the snapshot are passed to `fallback_loader`, e.g. to
+    render them.
+
+    Positions can still be overridden with import_posittions.
+    """
+
+    def __init__(self, fallback_loader=None):
+        super().__init__()
+        self.fallback_loader = fallback_loader
+        self._file = None
+        self._map = None
+        self._blob_offset = 0
+        # Fingerprint of the model file the snapshot was built from, see source_fingerprint
+        self.source = None
+        # str(class_id) -> svg, png and code blob refs
+        self._blob_refs = {}
+
+    def import_classes_and_relationships(self, input_path: str):
+        self.close()
+        self._file = open(input_path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = self._map
+
+        class_count, relationship_count, heap_offset, source_size, values_size = \
+            _check_header(view[:_HEADER.size], input_path, len(view))
+        self.source = json.loads(view[heap_offset:heap_offset + source_size])
+        values_offset = heap_offset + source_size
+        values = json.loads(view[values_offset:values_offset + values_size])
+        self._blob_offset = values_offset + values_size
+
+        # Step 1: Classes with their geometry; blobs stay in the file
+        groups = {}
+        offset = _HEADER.size
+        for record in _CLASS.iter_unpack(view[offset:offset + _CLASS.size * class_count]):
+            id_index, name_index, methods_index, groups_index, label_index, flags, x, y, width, height = record[:10]
+
+            group_path = groups.get(groups_index)
+            if group_path is None:
+                group_path = groups[groups_index] = self.group_paths.intern(values[groups_index])
+
+            uml_class = UmlClass(values[id_index], values[name_index], values[methods_index],
+                                 bool(flags & _FLAG_ABSTRACT), group_path, (x, y), (width, height),
+                                 None, None, None, geometry=self.geometry)
+            uml_class.label = values[label_index]
+            uml_class.artifact_loader = self._load_artifact
+            self._blob_refs[str(uml_class.class_id)] = record[10:]
+            if flags & _FLAG_PINNED:
+                self.pinned_ids.add(str(uml_class.class_id))
+            self.uml_classes.append(uml_class)
+            self.class_index.add(uml_class)
+        offset += _CLASS.size * class_count
+
+        # Step 2: Relationships
+        for source, destination, relationship_type, access, label in \
+                _RELATIONSHIP.iter_unpack(view[offset:offset + _RELATIONSHIP.size * relationship_count]):
+            uml_relationship = UmlRelationship(values[source], values[destination], values[relationship_type],
+                                               values[access], values[label])
+            self.relationships.append(uml_relationship)
+            self.relationship_index.add(uml_relationship)
+
+        return self.uml_classes, self.relationships
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # -------------------------------------------------------------
+
+    def _load_artifact(self, uml_class: UmlClass, artifact: str):
+        refs = self._blob_refs.get(str(uml_class.class_id))
+        if refs is not None and artifact in _BLOB_ARTIFACTS:
+            index = _BLOB_ARTIFACTS.index(artifact) * 2
+            offset, length = refs[index], refs[index + 1]
+            if length != _NO_BLOB:
+                start = self._blob_offset + offset
+                data = self._map[start:start + length]
+                if artifact == ARTIFACT_PNG:
+                    # Same shape as a freshly rendered PNG
+                    width, height = png_size(data)
+                    return {"png": data, "width": width, "height": height, "label": uml_class.label}
+                return data.decode("utf-8")
+        if self.fallback_loader is not None:
+            return self.fallback_loader(uml_class, artifact)
+        return None
@@ -0,0 +1,180 @@
+# streaming_json_importer.py
+from typing import Iterator, Union
+
+from core.uml_class import UmlClass
+from core.uml_relationshpi import UmlRelationship
+from importer.json_importer import JsonUmlImporter
+from importer.json_stream import iter_json_file, build_value, skip_value
+
+
+class _ElementFrame:
+    """
+    One open element map inside an "elements" array.
+    """
+    def __init__(self, parent_path: list):
+        self.parent_path = parent_path
+        self.fields = {}
+        self.group_path = None
+        # Items parsed inside a nested "elements" array, held until this
+        # element is complete, as a class may have fields after its children
+        self.children = None
+
+    def current_group_path(self) -> list:
+        # Shared by all children of this element, like the recursive importer
+        if self.group_path is None:
+            display_name = self.fields.get("display_name", "")
+            self.group_path = self.parent_path + [display_name] if display_name else self.parent_path
+        return self.group_path
+
+
+class StreamingJsonUmlImporter(JsonUmlImporter):
+    """
+    JSON importer that parses `elements` and `relationships` incrementally
+    and walks nested groups with an explicit stack, so memory stays bounded
+    by the model objects and deep nesting cannot hit the recursion limit.
+
+    Expects `display_name` to precede a nested `elements` array within an
+    element, as written by the code indexer. The descendants of a class are
+    held back until the class map is closed, so fields after its nested
+    `elements` are kept and the order matches JsonUmlImporter.
+    """
+
+    def import_classes_and_relationships(self, input_path: str):
+        for item in self.iter_model(input_path):
+            if isinstance(item, UmlClass):
+                self.uml_classes.append(item)
+                self.class_index.add(item)
+            else:
+                self.relationships.append(item)
+                self.relationship_index.add(item)
+
+        return self.uml_classes, self.relationships
+
+    def iter_classes(self, input_path: str) -> Iterator[UmlClass]:
+        for item in self.iter_model(input_path):
+            if isinstance(item, UmlClass):
+                yield item
+
+    def iter_relationships(self, input_path: str) -> Iterator[UmlRelationship]:
+        for item in self.iter_model(input_path):
+            if isinstance(item, UmlRelationship):
+                yield item
+
+    def iter_model(self, input_path: str) -> Iterator[Union[UmlClass, UmlRelationship]]:
+        """
+        Yields classes and relationships in file order as they are parsed.
+        """
+        events = iter_json_file(input_path)
+
+        event, _ = next(events)
+        if event != "start_map":
+            raise ValueError(f"{input_path}: expected a JSON object at the top level")
+
+        for event, value in events:
+            if event == "end_map":
+                return
+
+            # event == "map_key" at the top level
+            event, _ = next(events)
+            if value == "elements" and event == "start_array":
+                yield from self._iter_elements(events)
+            elif value == "relationships" and event == "start_array":
+                yield from self._iter_relationships(events)
+            else:
+                skip_value(events, event)
+
+    # -------------------------------------------------------------
+
+    def _iter_elements(self, events) -> Iterator[UmlClass]:
+        # Stack entries are either None (an "elements" array) or an open element
+        stack = [None]
+        array_paths = [[]]
+        warned = False
+
+        for event, value in events:
+            frame = stack[-1]
+
+            if frame is None:
+                # Inside an "elements" array
+                if event == "start_map":
+                    stack.append(_ElementFrame(array_paths[-1]))
+                elif event == "end_array":
+                    stack.pop()
+                    array_paths.pop()
+                    if not stack:
+                        return
+                else:
+                    skip_value(events, event)
+                continue
+
+            if event == "end_map":
+                stack.pop()
+                items = [self._make_class(frame)] if frame.fields.get("type") == "class" else []
+                if frame.children is not None:
+                    items.extend(frame.children)
+                buffer = self._open_buffer(stack)
+                if buffer is not None:
+                    buffer.extend(items)
+                else:
+                    yield from items
+                continue
+
+            # event == "map_key" inside an element
+            key = value
+            event, value = next(events)
+            if key == "elements" and event == "start_array":
+                # Plain groups pass their children through; a class (or an
+                # element of unknown type so far) holds them until end_map
+                if frame.children is None and frame.fields.get("type", "class") == "class":
+                    frame.children = []
+                stack.append(None)
+                array_paths.append(frame.current_group_path())
+            else:
+                if key == "display_name" and frame.group_path is not None and not warned:
+                    print("Warning: display_name after nested elements; group path may be incomplete.")
+                    warned = True
+                frame.fields[key] = build_value(events, event, value)
+
+        raise ValueError("Unexpected end of JSON stream inside elements")
+
+    @staticmethod
+    def _open_buffer(stack):
+        """
+        Children list of the innermost element that holds back its descendants.
+        """
+        for frame in reversed(stack):
+            if frame is not None and frame.children is not None:
+                return frame.children
+        return None
+
+    def _iter_relationships(self, events) -> Iterator[UmlRelationship]:
+        for event, value in events:
+            if event == "end_array":
+                return
+            relationship = build_value(events, event, value)
+            if isinstance(relationship, dict):
+                yield UmlRelationship(
+                    relationship['source'],
+                    relationship['destination'],
+                    relationship['type'],
+                    relationship.get('access', 'public'),
+                    relationship.get('label'),
+                )
+
+        raise ValueError("Unexpected end of JSON stream inside relationships")
+
+    def _make_class(self, frame: _ElementFrame) -> UmlClass:
+        fields = frame.fields
+        return UmlClass(
+            fields['id'],
+            fields['name'],
+            fields.get('methods', []),
+            fields.get("is_abstract", False),
+            self.group_paths.intern(frame.current_group_path()),
+            (0.0, 0.0),
+            (0.0, 0.0),
+            None,
+            None,
+            None,
+            geometry=self.geometry,
+        )
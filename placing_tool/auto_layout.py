@@ -0,0 +1,135 @@
+# auto_layout.py
+import math
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+from core.uml_class import UmlClass
+from export.graphviz_exporter import build_class_group_tree
+
+
+class AutoLayout:
+    """
+    Headless initial layout for classes without a stored position.
+
+    Classes are packed group by group into grids, following the `groups`
+    hierarchy so every group ends up in its own non-overlapping block. The
+    unpinned block is placed below the classes that already have a position,
+    which are never moved.
+    """
+
+    def __init__(self, spacing: float = 40.0, group_padding: float = 20.0, group_label_height: float = 24.0,
+                 default_size: Tuple[float, float] = (120.0, 80.0)):
+        self.spacing = spacing
+        self.group_padding = group_padding
+        self.group_label_height = group_label_height
+        # Used for classes that have not been rendered yet
+        self.default_size = default_size
+
+    def layout(self, classes: List[UmlClass], pinned_ids: Iterable = None) -> int:
+        """
+        Assigns positions to all classes that are not pinned and returns how
+        many were placed. Without `pinned_ids`, classes that are not at
+        (0, 0) count as pinned.
+        """
+        if pinned_ids is None:
+            pinned = [uml_class for uml_class in classes if tuple(uml_class.position) != (0.0, 0.0)]
+        else:
+            pinned_ids = {str(class_id) for class_id in pinned_ids}
+            pinned = [uml_class for uml_class in classes if str(uml_class.class_id) in pinned_ids]
+
+        pinned_set = set(map(id, pinned))
+        free = [uml_class for uml_class in classes if id(uml_class) not in pinned_set]
+        if not free:
+            return 0
+
+        # Step 1: Pack the free classes relative to (0, 0)
+        placed, xs, ys, _, _ = self._pack_group(build_class_group_tree(free))
+
+        # Step 2: Move the block below the pinned classes
+        origin_x, origin_y = 0.0, 0.0
+        if pinned:
+            pinned_x = np.array([uml_class.position[0] for uml_class in pinned])
+            pinned_y = np.array([uml_class.position[1] for uml_class in pinned])
+            pinned_h = np.array([self._size(uml_class)[1] for uml_class in pinned])
+            origin_x = float(pinned_x.min())
+            origin_y = float((pinned_y + pinned_h).max()) + self.spacing
+
+        xs = xs + origin_x
+        ys = ys + origin_y
+        for uml_class, x, y in zip(placed, xs.tolist(), ys.tolist()):
+            uml_class.position = (x, y)
+
+        return len(placed)
+
+    # -------------------------------------------------------------
+
+    def _size(self, uml_class: UmlClass) -> Tuple[float, float]:
+        width, height = uml_class.size
+        if not width or not height:
+            return self.default_size
+        return (width, height)
+
+    def _pack_group(self, group_dict: dict):
+        """
+        Packs one group level. Returns the classes, their x/y offsets relative
+        to the block's top-left corner and the block width and height.
+        """
+        # Step 1: Collect the items of this level, classes first, then subgroups
+        own_classes = group_dict.get("_classes", [])
+        sizes = [self._size(uml_class) for uml_class in own_classes]
+        widths = [width for width, _ in sizes]
+        heights = [height for _, height in sizes]
+        subgroup_blocks = []    # (classes, x offsets, y offsets) of each subgroup
+
+        inset_x = self.group_padding
+        inset_y = self.group_padding + self.group_label_height
+        for group_name, subgroups in group_dict.items():
+            if group_name == "_classes":
+                continue
+            placed, xs, ys, width, height = self._pack_group(subgroups)
+            # Leave room for the group frame and its label
+            subgroup_blocks.append((placed, xs + inset_x, ys + inset_y))
+            widths.append(width + 2 * inset_x)
+            heights.append(height + inset_y + self.group_padding)
+
+        count = len(widths)
+        if count == 0:
+            return [], np.zeros(0), np.zeros(0), 0.0, 0.0
+
+        # Step 2: Grid with a roughly square outline
+        widths = np.asarray(widths, dtype=float)
+        heights = np.asarray(heights, dtype=float)
+        aspect = (heights.mean() + self.spacing) / (widths.mean() + self.spacing)
+        cols = min(count, max(1, round(math.sqrt(count * aspect))))
+        rows = math.ceil(count / cols)
+
+        cells = rows * cols
+        grid_w = np.zeros(cells)
+        grid_h = np.zeros(cells)
+        grid_w[:count] = widths
+        grid_h[:count] = heights
+        col_widths = grid_w.reshape(rows, cols).max(axis=0)
+        row_heights = grid_h.reshape(rows, cols).max(axis=1)
+
+        col_x = np.concatenate(([0.0], np.cumsum(col_widths + self.spacing)[:-1]))
+        row_y = np.concatenate(([0.0], np.cumsum(row_heights + self.spacing)[:-1]))
+        index = np.arange(count)
+        item_x = col_x[index % cols]
+        item_y = row_y[index // cols]
+
+        # Step 3: Classes sit at their cell, subgroup contents are offset by theirs
+        own = len(own_classes)
+        placed = list(own_classes)
+        xs = [item_x[:own]]
+        ys = [item_y[:own]]
+        for (block_classes, block_xs, block_ys), x, y in zip(subgroup_blocks, item_x[own:], item_y[own:]):
+            placed.extend(block_classes)
+            xs.append(block_xs + x)
+            ys.append(block_ys + y)
+        xs = np.concatenate(xs)
+        ys = np.concatenate(ys)
+
+        block_width = float(col_widths.sum() + self.spacing * (cols - 1))
+        block_height = float(row_heights.sum() + self.spacing * (rows - 1))
+        return placed, xs, ys, block_width, block_height
@@ -0,0 +1,174 @@
+# file_watcher.py
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+# inotify constants from <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_inotify():
+    if not hasattr(select, "poll"):
+        return None
+    library = ctypes.util.find_library("c")
+    if library is None:
+        return None
+    try:
+        libc = ctypes.CDLL(library, use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    """
+    Reports completed saves of a single file.
+
+    Uses inotify on Linux and falls back to polling the file's mtime/size
+    elsewhere. A change is reported only once the file has been quiet for
+    `debounce` seconds, so editors that write in several steps trigger one
+    notification per save.
+    """
+
+    def __init__(self, file_path: str, debounce: float = 0.2, poll_interval: float = 0.5):
+        self.file_path = os.path.abspath(file_path)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+
+        self._fd = None
+        self._last_stat = self._stat()
+
+        libc = _load_inotify()
+        if libc is not None:
+            self._start_inotify(libc)
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def wait_for_change(self, timeout: float = None) -> bool:
+        """
+        Blocks until the file was saved or `timeout` seconds passed.
+        Returns True for a save.
+        """
+        if self._fd is not None:
+            changed = self._wait_inotify(timeout)
+        else:
+            changed = self._wait_polling(timeout)
+
+        if not changed:
+            return False
+
+        # Editors sometimes touch the file without changing it
+        current = self._stat()
+        if current == self._last_stat:
+            return False
+        self._last_stat = current
+        return True
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # -------------------------------------------------------------
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _start_inotify(self, libc):
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return
+
+        # Watch the directory: editors often replace the file via rename
+        directory = os.path.dirname(self.file_path).encode()
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(fd, directory, mask) < 0:
+            os.close(fd)
+            return
+
+        self._fd = fd
+        self._poller = select.poll()
+        self._poller.register(fd, select.POLLIN)
+
+    def _read_events(self, timeout: float) -> bool:
+        """
+        Waits up to `timeout` seconds and reports whether an event for our
+        file arrived.
+        """
+        wait_ms = None if timeout is None else max(0, int(timeout * 1000))
+        if not self._poller.poll(wait_ms):
+            return False
+
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return False
+            raise
+
+        name = os.path.basename(self.file_path).encode()
+        offset = 0
+        relevant = False
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            event_name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if event_name == name:
+                relevant = True
+        return relevant
+
+    def _wait_inotify(self, timeout: float) -> bool:
+        if not self._read_events(timeout):
+            return False
+
+        # Debounce: wait until the burst of writes for this save is over
+        while self._read_events(self.debounce):
+            pass
+        return True
+
+    def _wait_polling(self, timeout: float) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            current = self._stat()
+            if current != self._last_stat:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            sleep_for = self.poll_interval
+            if deadline is not None:
+                sleep_for = min(sleep_for, max(0.0, deadline - time.monotonic()))
+            time.sleep(sleep_for)
+
+        # Debounce: wait until the file stops changing
+        while True:
+            time.sleep(self.debounce)
+            settled = self._stat()
+            if settled == current:
+                return True
+            current = settled
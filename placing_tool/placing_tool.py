@@ -1,5 +1,4 @@
 import os
-import time
 import shutil
 import tempfile
 import xml.etree.ElementTree as ET
@@ -7,20 +6,25 @@ import subprocess
 
 from application.interface import UmlExporter
 from core.uml_class import UmlClass
+from core.uml_class_index import UmlClassIndex
 from core.uml_relationshpi import UmlRelationship
-from export.drawio_exporter import DrawioUmlExporter
+from core.spatial_index import SpatialIndex
+from export.drawio_exporter import DrawioUmlExporter, read_graph_root
+from placing_tool.file_watcher import FileWatcher
 
 class DrawioPositionTool:
     def __init__(self, exporter: UmlExporter = None):
         self.exporter = exporter or DrawioUmlExporter()
 
     def open_in_vscode(self, file_path: str):
-        subprocess.Popen(["code", "--wait", file_path])
+        return subprocess.Popen(["code", "--wait", file_path])
 
-    def update_positions_from_file(self, classes: list[UmlClass], file_path: str):
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        graph_root = root.find(".//root")
+    def update_positions_from_file(self, classes: list[UmlClass], file_path: str, class_index: UmlClassIndex = None,
+                                   spatial_index: SpatialIndex = None):
+        if class_index is None:
+            class_index = UmlClassIndex(classes)
+
+        _, graph_root = read_graph_root(file_path)
 
         if graph_root is None:
             print("No graph root found in the file.")
@@ -30,13 +34,13 @@ class DrawioPositionTool:
             cell_id = cell.attrib.get("id")
             geometry = cell.find("mxGeometry")
             if geometry is not None and geometry.attrib.get("as") == "geometry":
-                x = float(geometry.attrib.get("x", 0))
-                y = float(geometry.attrib.get("y", 0))
-
-                for uml_class in classes:
-                    if str(uml_class.class_id) == cell_id:
-                        uml_class.position = (x, y)
-                        break
+                uml_class = class_index.get(cell_id)
+                if uml_class is not None:
+                    x = float(geometry.attrib.get("x", 0))
+                    y = float(geometry.attrib.get("y", 0))
+                    uml_class.position = (x, y)
+                    if spatial_index is not None:
+                        spatial_index.update(uml_class)
 
     def prepare_temp_file(self, template_path: str = None) -> str:
         # Create a temporary file for editing
@@ -52,7 +56,14 @@ class DrawioPositionTool:
 
         return temp_file_path
 
-    def run(self, classes: list[UmlClass], relationships: list[UmlRelationship], file_path: str, template_path: str = None):
+    def run(self, classes: list[UmlClass], relationships: list[UmlRelationship], file_path: str, template_path: str = None,
+            class_index: UmlClassIndex = None, on_update=None, spatial_index: SpatialIndex = None):
+        """
+        Opens the diagram in VS Code and re-applies the positions after every
+        save until the editor is closed. `on_update(classes)` is called after
+        each applied save, e.g. to persist the positions. A given
+        `spatial_index` is kept in sync with the moved classes.
+        """
         # Step 1: Prepare a temporary file
         temp_file_path = self.prepare_temp_file(template_path)
 
@@ -60,19 +71,22 @@ class DrawioPositionTool:
         self.exporter.export(classes, relationships, temp_file_path)
 
         # Step 3: Open the temp file in VS Code
-        last_mtime = os.path.getmtime(temp_file_path)
+        watcher = FileWatcher(temp_file_path)
         print("Opening in VS Code Draw.io...")
-        self.open_in_vscode(temp_file_path)
-
-        # Step 4: Wait for user to save changes
-        print("Waiting for file to be modified...")
-        while True:
-            time.sleep(1)
-            current_mtime = os.path.getmtime(temp_file_path)
-            if current_mtime != last_mtime:
-                print("Temp file was modified. Reloading positions.")
-                self.update_positions_from_file(classes, temp_file_path)
-                break
+        editor = self.open_in_vscode(temp_file_path)
+
+        # Step 4: Apply every save until the editor exits
+        print("Waiting for saves (close the diagram in VS Code to finish)...")
+        try:
+            while editor.poll() is None:
+                if watcher.wait_for_change(timeout=0.5):
+                    self._apply_save(classes, temp_file_path, class_index, on_update, spatial_index)
+
+            # Pick up a save that raced with closing the editor
+            if watcher.wait_for_change(timeout=0):
+                self._apply_save(classes, temp_file_path, class_index, on_update, spatial_index)
+        finally:
+            watcher.close()
 
         # (Optional: you could copy back from temp_file_path to file_path if you want to save final result)
         # shutil.copy(temp_file_path, file_path)
@@ -85,3 +99,16 @@ class DrawioPositionTool:
             print(f"Could not remove temporary file: {e}")
 
         return classes
+
+    def _apply_save(self, classes: list[UmlClass], file_path: str, class_index: UmlClassIndex, on_update,
+                    spatial_index: SpatialIndex = None):
+        try:
+            self.update_positions_from_file(classes, file_path, class_index, spatial_index)
+        except ET.ParseError:
+            # Still being written; the next event delivers the complete file
+            print("Temp file is incomplete, waiting for the next save.")
+            return
+
+        print("Temp file was saved. Positions reloaded.")
+        if on_update:
+            on_update(classes)
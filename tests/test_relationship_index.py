@@ -0,0 +1,46 @@
+# test_relationship_index.py
+from core.relationship_index import RelationshipIndex
+from core.uml_relationshpi import UmlRelationship
+
+
+def make_index(edges, relationship_type="dependency") -> RelationshipIndex:
+    return RelationshipIndex(UmlRelationship(source, destination, relationship_type, "public", "")
+                             for source, destination in edges)
+
+
+def pruned_edges(index: RelationshipIndex) -> list:
+    return [(rel.source, rel.destination) for rel in index.pruned(("dependency",))]
+
+
+def reachable(edges, start) -> set:
+    found = {start}
+    stack = [start]
+    while stack:
+        node = stack.pop()
+        for source, destination in edges:
+            if source == node and destination not in found:
+                found.add(destination)
+                stack.append(destination)
+    return found
+
+
+def test_pruned_drops_edges_implied_in_a_dag():
+    edges = [("A", "B"), ("B", "C"), ("A", "C"), ("C", "D"), ("A", "D")]
+    assert pruned_edges(make_index(edges)) == [("A", "B"), ("B", "C"), ("C", "D")]
+
+
+def test_pruned_keeps_reachability_on_cycles():
+    edges = [("A", "D"), ("A", "C"), ("D", "A"), ("D", "C")]
+    pruned = pruned_edges(make_index(edges))
+    for node in "ACD":
+        assert reachable(pruned, node) == reachable(edges, node)
+    assert len(pruned) == 3
+
+
+def test_unique_keeps_parallel_relationships_with_different_labels():
+    index = RelationshipIndex([
+        UmlRelationship("A", "B", "association", "public", "owner"),
+        UmlRelationship("A", "B", "association", "public", "owner"),
+        UmlRelationship("A", "B", "association", "public", "parent"),
+    ])
+    assert [rel.label for rel in index.unique()] == ["owner", "parent"]
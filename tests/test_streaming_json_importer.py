@@ -0,0 +1,33 @@
+# test_streaming_json_importer.py
+import json
+
+from importer.json_importer import JsonUmlImporter
+from importer.streaming_json_importer import StreamingJsonUmlImporter
+
+
+def class_fields(importer: JsonUmlImporter, path: str) -> list:
+    classes, _ = importer.import_classes_and_relationships(path)
+    return [(c.class_id, c.name, c.methods, c.is_abstract, tuple(c.groups)) for c in classes]
+
+
+def test_fields_after_nested_elements(tmp_path):
+    model = {
+        "elements": [
+            {"display_name": "pkg", "type": "group", "elements": [
+                {"id": 1, "name": "Outer", "type": "class", "display_name": "Outer",
+                 "elements": [
+                     {"id": 2, "name": "Inner", "type": "class", "methods": [{"name": "g"}]},
+                 ],
+                 "methods": [{"name": "f"}], "is_abstract": True},
+                {"id": 3, "name": "Sibling", "type": "class"},
+            ]},
+            {"elements": [{"id": 4, "name": "Late", "type": "class"}], "id": 5, "name": "Typed late", "type": "class"},
+        ],
+        "relationships": [],
+    }
+    path = tmp_path / "model.json"
+    path.write_text(json.dumps(model))
+
+    expected = class_fields(JsonUmlImporter(), str(path))
+    assert class_fields(StreamingJsonUmlImporter(), str(path)) == expected
+    assert expected[0] == (1, "Outer", [{"name": "f"}], True, ("pkg", "Outer"))
@@ -0,0 +1,151 @@
+#uml_batch.py
+#
+# Headless batch build of many models in one process. Classes without a
+# stored position are placed by the auto layout instead of the interactive
+# VS Code step.
+#
+#   python uml_batch.py --glob "input/*.json" --output-dir output
+#   python uml_batch.py --pair input/blinky.json input/blinky_positions.json --jobs 4
+import os
+import sys
+import glob
+import time
+import argparse
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from application.uml_app import UmlClassDiagram
+from application.render_pool import ClassRenderPool
+from class_generators.graphviz_class_generator import GraphvizClassDiagramGenerator
+from class_generators.render_cache import RenderCache
+
+POSITIONS_SUFFIX = "_positions.json"
+
+
+class BatchJob:
+    def __init__(self, model_path: str, positions_path: str = None, name: str = None):
+        self.model_path = model_path
+        self.positions_path = positions_path
+        self.name = name or os.path.splitext(os.path.basename(model_path))[0]
+
+
+def collect_jobs(pairs, patterns) -> list:
+    """
+    Jobs for the explicit (model, positions) pairs and the models matched by
+    the glob patterns. A matched model uses `<name>_positions.json` next to
+    it when that file exists.
+    """
+    jobs = [BatchJob(model_path, positions_path) for model_path, positions_path in pairs]
+
+    for pattern in patterns:
+        for model_path in sorted(glob.glob(pattern, recursive=True)):
+            if model_path.endswith(POSITIONS_SUFFIX) or not os.path.isfile(model_path):
+                continue
+            positions_path = os.path.splitext(model_path)[0] + POSITIONS_SUFFIX
+            jobs.append(BatchJob(model_path, positions_path if os.path.exists(positions_path) else None))
+    return jobs
+
+
+def make_names_unique(jobs: list) -> list:
+    """
+    Output names must be unique, as all models write into the same directory.
+    """
+    names = {job.name for job in jobs}
+    seen = set()
+    for job in jobs:
+        if job.name in seen:
+            suffix = 2
+            while f"{job.name}_{suffix}" in names:
+                suffix += 1
+            job.name = f"{job.name}_{suffix}"
+            names.add(job.name)
+        seen.add(job.name)
+    return jobs
+
+
+def build_model(job: BatchJob, options, generator, render_pool) -> list:
+    """
+    Imports, renders, lays out and exports one model. Returns the names of the failed exporters.
+    """
+    # cache_dir=None keeps a disabled shared cache from falling back to the default directory
+    diagram = UmlClassDiagram(
+        cache_dir=None, render_cache=generator.cache, render_pool=render_pool, graphviz_generator=generator,
+        render_batch=options.batch, streaming_import=options.streaming,
+        output_dir=options.output_dir, output_name=job.name, export_workers=options.export_workers,
+        native_graphviz_layout=options.native_layout, partition_mode=options.partition,
+    )
+    try:
+        diagram.import_file(job.model_path)
+        if job.positions_path:
+            diagram.import_positions(job.positions_path)
+        diagram.gernate_classes()
+        if not options.no_layout:
+            diagram.auto_layout(save=options.save_positions)
+
+        results = diagram.export_diagram()
+    finally:
+        diagram.close()
+    return [type(result.exporter).__name__ for result in results if not result.ok]
+
+
+def run_job(job: BatchJob, options, generator, render_pool):
+    start = time.perf_counter()
+    try:
+        failed = build_model(job, options, generator, render_pool)
+        error = f"exporters failed: {', '.join(failed)}" if failed else None
+    except Exception as e:
+        print(f"[{job.name}] failed:")
+        traceback.print_exc()
+        error = repr(e)
+    seconds = time.perf_counter() - start
+    print(f"[{job.name}] {'FAILED' if error else 'done'} in {seconds:.2f}s")
+    return job, error
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build UML diagrams for many models without interactive placing")
+    parser.add_argument("--pair", nargs=2, action="append", default=[], metavar=("MODEL", "POSITIONS"),
+                        help="model and positions file; may be repeated")
+    parser.add_argument("--glob", action="append", default=[], metavar="PATTERN",
+                        help=f"model files to build; <name>{POSITIONS_SUFFIX} is used when present")
+    parser.add_argument("models", nargs="*", help="model files without positions")
+    parser.add_argument("--output-dir", default="output")
+    parser.add_argument("--jobs", type=int, default=4, help="models built concurrently")
+    parser.add_argument("--render-workers", type=int, default=0, help="shared render pool size, 0 for one per CPU")
+    parser.add_argument("--batch", action="store_true", help="render each model's classes in one Graphviz call per format")
+    parser.add_argument("--cache-dir", default=".uml_render_cache")
+    parser.add_argument("--streaming", action="store_true", help="use the streaming JSON importer")
+    parser.add_argument("--export-workers", type=int, default=None)
+    parser.add_argument("--native-layout", action="store_true", help="render the Graphviz export without the layout solver")
+    parser.add_argument("--partition", choices=["group", "tile"], default=None)
+    parser.add_argument("--no-layout", action="store_true", help="keep unplaced classes at (0, 0)")
+    parser.add_argument("--save-positions", action="store_true", help="write auto-layout positions back")
+    options = parser.parse_args(argv)
+
+    jobs = collect_jobs(options.pair, options.glob)
+    jobs.extend(BatchJob(model_path) for model_path in options.models)
+    make_names_unique(jobs)
+    if not jobs:
+        parser.error("no models given")
+
+    # One cache, generator and render pool for all models
+    cache = RenderCache(options.cache_dir) if options.cache_dir else None
+    generator = GraphvizClassDiagramGenerator(cache=cache)
+    render_pool = ClassRenderPool(options.render_workers or None, "thread")
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, options.jobs)) as executor:
+            outcomes = list(executor.map(lambda job: run_job(job, options, generator, render_pool), jobs))
+    finally:
+        render_pool.close()
+
+    failures = [(job, error) for job, error in outcomes if error]
+    print(f"Built {len(jobs) - len(failures)} of {len(jobs)} models in {time.perf_counter() - start:.2f}s")
+    for job, error in failures:
+        print(f"  {job.model_path}: {error}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
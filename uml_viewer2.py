@@ -5,19 +5,55 @@ from application.uml_app import UmlClassDiagram
 
 def main():
     # === Config ===
-    umlClassDiagram = UmlClassDiagram()
+    # Set to write output/profile.json and output/profile.trace.json
+    profile = False
+    # Also record the peak memory per stage (tracemalloc, slows the run down noticeably)
+    profile_memory = False
+    # "plantuml" renders the class images through one long-lived PlantUML process
+    render_backend = "graphviz"
+    umlClassDiagram = UmlClassDiagram(profile=profile, profile_memory=profile_memory,
+                                      render_backend=render_backend,
+                                      plantuml_server=render_backend == "plantuml")
 
     json_path_data = "input/blinky.json"
     json_path_pos = "input/blinky_positions.json"
     output_folder = "class_diagrams"
     drawio_output = "output/diagram.drawio"
+    # Patch the previous outputs instead of rebuilding (skips interactive placing)
+    incremental = False
+    # Lay out unplaced classes automatically instead of editing them in VS Code
+    headless = False
+    # Minify the class SVGs before they are embedded in the diagram
+    optimize_svgs = False
+    # Written after a full build; later runs start from it while the JSON input is unchanged
+    snapshot_path = "output/blinky.snapshot"
+    use_snapshot = False
 
     # === Step 1: Load JSON data ===
-    umlClassDiagram.import_file(json_path_data)
+    from_snapshot = use_snapshot and not incremental and umlClassDiagram.load_snapshot(snapshot_path, json_path_data)
+    if not from_snapshot:
+        umlClassDiagram.import_file(json_path_data)
     umlClassDiagram.import_positions(json_path_pos)
-    umlClassDiagram.gernate_classes()
-    umlClassDiagram.place()
-    umlClassDiagram.export_diagram()
+
+    if incremental:
+        umlClassDiagram.build_incremental()
+    else:
+        if not from_snapshot:
+            umlClassDiagram.gernate_classes()
+            if optimize_svgs:
+                umlClassDiagram.optimize_svgs()
+            if use_snapshot:
+                umlClassDiagram.save_snapshot(snapshot_path)
+        if headless:
+            umlClassDiagram.auto_layout()
+        else:
+            umlClassDiagram.place()
+        umlClassDiagram.export_diagram()
+
+    if profile:
+        umlClassDiagram.write_profile("output/profile.json", "output/profile.trace.json")
+
+    umlClassDiagram.close()
 
     print("✅ Done")
 